@@ -4,11 +4,12 @@ LangGraph agent implementation
 """
 from typing import Literal
 from langgraph.graph import START, END, StateGraph, MessagesState
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import ToolNode
 from langchain_core.messages import AIMessage
 from retriever import retrieve_nelfund_info
 from llm import SYSTEM_PROMPT
+from checkpoint import create_checkpointer
+from history import trim_history
 
 
 def create_agent(llm):
@@ -31,10 +32,10 @@ def create_agent(llm):
     tools = [retrieve_nelfund_info]
     llm_with_tools = llm.bind_tools(tools)
     
-    def assistant_node(state: MessagesState) -> dict:
+    async def assistant_node(state: MessagesState) -> dict:
         """Main assistant node - decides whether to retrieve"""
-        messages = [SYSTEM_PROMPT] + state["messages"]
-        response = llm_with_tools.invoke(messages)
+        messages = [SYSTEM_PROMPT] + trim_history(state["messages"])
+        response = await llm_with_tools.ainvoke(messages)
         return {"messages": [response]}
     
     def should_retrieve(state: MessagesState) -> Literal["retrieve", "__end__"]:
@@ -67,7 +68,7 @@ def create_agent(llm):
     builder.add_edge("retrieve", "assistant")
     
     # Add memory
-    memory = MemorySaver()
+    memory = create_checkpointer()
     agent = builder.compile(checkpointer=memory)
     
     print("✅ Agent created with conversation memory")
@@ -0,0 +1,82 @@
+"""
+answer_cache.py
+Semantic cache of first-turn answers keyed on query embeddings
+"""
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from cache import LRUCache
+
+
+class SemanticAnswerCache(LRUCache):
+    """
+    LRU + TTL cache of answers, looked up by cosine similarity.
+    Query vectors are expected to be L2-normalized (as produced by
+    create_embeddings), so cosine similarity is a dot product.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl_seconds: float):
+        super().__init__(max_entries)
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(question: str) -> str:
+        return " ".join(question.lower().split())
+
+    def _purge_expired(self, now: float):
+        expired = [k for k, e in self._data.items() if now - e["created_at"] > self.ttl_seconds]
+        for key in expired:
+            del self._data[key]
+
+    def lookup(self, vector: List[float]) -> Optional[Dict]:
+        """Return the closest cached answer above the threshold, if any"""
+        query = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            self._purge_expired(time.monotonic())
+
+            best_key, best_score = None, self.threshold
+            for key, entry in self._data.items():
+                score = float(np.dot(entry["vector"], query))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self._miss()
+                return None
+
+            entry = self._hit(best_key)
+            return {
+                "question": entry["question"],
+                "response": entry["response"],
+                "sources": entry["sources"],
+                "used_retrieval": entry["used_retrieval"],
+                "similarity": best_score
+            }
+
+    def store(self, question: str, vector: List[float], response: str,
+              sources: List[Dict], used_retrieval: bool):
+        """Cache an answer, evicting the least recently used entry when full"""
+        self.put(self._key(question), {
+            "question": question,
+            "vector": np.asarray(vector, dtype=np.float32),
+            "response": response,
+            "sources": sources,
+            "used_retrieval": used_retrieval,
+            "created_at": time.monotonic()
+        })
+
+    def clear(self):
+        """Drop every cached answer (e.g. after the index is rebuilt)"""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for /status"""
+        stats = super().stats()
+        with self._lock:
+            stats["invalidations"] = self.invalidations
+        return stats
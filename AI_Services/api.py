@@ -395,27 +395,136 @@
 api.py
 FastAPI endpoints
 """
+import asyncio
+import json
 import re
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
-from langchain_core.messages import HumanMessage, AIMessage
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 from models import ChatRequest, ChatResponse
 from config import config
 from llm import extract_content_from_ai_message
+from retriever import get_retriever, cache_stats, rerank_stats, context_compression_stats
+from answer_cache import SemanticAnswerCache
+from sessions import create_session_store
+from checkpoint import CompactingMemorySaver, SQLiteSaver
+from history import history_stats
+from router import IntentRouter
+from faq import FAQIndex, render_answer
+from index_reload import IndexReloader
+from vectorstore import active_index_path
 
 
-# Session storage
-sessions = {}
+# Semantic answer cache
+answer_cache = SemanticAnswerCache(
+    threshold=config.ANSWER_CACHE_THRESHOLD,
+    max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS
+) if config.ANSWER_CACHE_ENABLED else None
 
 
-def create_app(agent, nelfund_retriever, llm):
-    """Create and configure FastAPI application"""
+def current_turn(messages: List) -> List:
+    """Messages produced since the latest user message in the thread"""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return messages[i + 1:]
+    return messages
+
+
+def collect_sources(messages: List) -> List[Dict]:
+    """Build deduplicated citations from retrieval tool artifacts"""
+    sources = []
+    seen = set()
+
+    for message in messages:
+        if not isinstance(message, ToolMessage) or not isinstance(message.artifact, list):
+            continue
+        for doc in message.artifact:
+            source_entry = {
+                "source": doc.get("source", "Unknown"),
+                "page": doc.get("page", "N/A"),
+                "content_preview": doc.get("content", "")[:200] + "..."
+            }
+            key = (source_entry["source"], source_entry["page"], source_entry["content_preview"])
+            if key not in seen:
+                seen.add(key)
+                sources.append(source_entry)
+
+    return sources
+
+
+def format_response(text: str) -> str:
+    """Clean escape sequences and markdown for display"""
+    text = re.sub(r"\*\*(.*?)\*\*", r"\1", text)  # Remove bold markdown
+    text = re.sub(r"[\n•*-]+", ". ", text)  # Replace newlines and bullets with periods
+    text = re.sub(r"\s{2,}", " ", text).strip()  # Remove extra spaces
+    text = re.sub(r"\.\s*\.", ".", text)  # Fix double periods
+    text = re.sub(r"\s+([.,!?])", r"\1", text)  # Fix spacing before punctuation
+    
+    # Ensure proper sentence endings
+    if text and not text[-1] in '.!?':
+        text += "."
+    
+    return text
+
+
+def summarize_turn(messages: List) -> Tuple[str, bool, List[Dict]]:
+    """Final formatted reply, retrieval flag and sources for the latest turn"""
+    turn_messages = current_turn(messages)
+    used_retrieval = any(
+        isinstance(message, AIMessage) and message.tool_calls
+        for message in turn_messages
+    )
+    sources = collect_sources(turn_messages)
+    
+    final_response = None
+    for message in turn_messages:
+        if isinstance(message, AIMessage):
+            final_response = extract_content_from_ai_message(message)
+    
+    if not final_response:
+        final_response = "I apologize, I couldn't generate a response. Please try rephrasing your question."
+    
+    return format_response(final_response), used_retrieval, sources
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def create_app(agent=None, nelfund_retriever=None, llm=None, lifespan=None, startup=None):
+    """
+    Create and configure FastAPI application.
+    The app can be created before its components exist: endpoints answer
+    503 until attach_components() (exposed as app.state.attach_components)
+    is called, and /ready reports progress from the StartupTracker.
+    The session store's background threads run only while the app is serving.
+    """
+    
+    # Session storage
+    sessions = create_session_store()
+    
+    @asynccontextmanager
+    async def app_lifespan(app):
+        sessions.start()
+        try:
+            if lifespan is None:
+                yield
+            else:
+                async with lifespan(app):
+                    yield
+        finally:
+            await asyncio.to_thread(sessions.close)
     
     app = FastAPI(
         title="NELFUND Student Loan Navigator API",
         description="Intelligent AI Assistant for Nigerian Student Loan Guidance",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=app_lifespan
     )
     
     # CORS middleware
@@ -427,6 +536,135 @@ def create_app(agent, nelfund_retriever, llm):
         allow_headers=["*"],
     )
     
+    intent_router = None
+    faq_index = None
+    checkpointer = None
+    
+    def attach_components(new_agent, new_retriever, new_llm):
+        """Wire in the loaded components; the API serves chats from here on"""
+        nonlocal agent, nelfund_retriever, llm, intent_router, faq_index, checkpointer
+        
+        # Local small-talk router (uses the already-loaded embedding model)
+        intent_router = IntentRouter(
+            new_retriever.embeddings,
+            threshold=config.ROUTER_THRESHOLD,
+            max_words=config.ROUTER_MAX_WORDS
+        ) if config.ROUTER_ENABLED and new_retriever else None
+        
+        # Official FAQ answers (index written at ingest)
+        faq_index = FAQIndex.load(
+            active_index_path(),
+            threshold=config.FAQ_MATCH_THRESHOLD
+        ) if config.FAQ_ENABLED else None
+        
+        # Drop agent checkpoints along with evicted sessions
+        checkpointer = getattr(new_agent, "checkpointer", None)
+        if isinstance(checkpointer, (CompactingMemorySaver, SQLiteSaver)):
+            sessions.on_evict(checkpointer.delete_thread)
+        
+        nelfund_retriever, llm = new_retriever, new_llm
+        # Assigned last: a non-None agent is what marks the API as ready
+        agent = new_agent
+    
+    app.state.attach_components = attach_components
+    if agent is not None:
+        attach_components(agent, nelfund_retriever, llm)
+    
+    # Per-worker cap on in-flight agent runs
+    chat_slots = asyncio.Semaphore(config.MAX_CONCURRENT_CHATS)
+    
+    def not_ready() -> HTTPException:
+        """503 telling clients to retry once startup has finished (500 if it failed)"""
+        if startup is not None and startup.failed:
+            return HTTPException(status_code=500, detail="Service failed to initialize")
+        return HTTPException(
+            status_code=503,
+            detail="Service initializing",
+            headers={"Retry-After": str(config.STARTUP_RETRY_AFTER_SECONDS)}
+        )
+    
+    # Session store calls can wait on SQLite writes, so they run off the event loop
+    async def ensure_session(phone_number: str):
+        """Get or create session"""
+        if not phone_number:
+            raise HTTPException(status_code=400, detail="phone_number is required")
+        await asyncio.to_thread(sessions.ensure, phone_number)
+    
+    def append_exchange(phone_number: str, user_message: str, reply: str):
+        sessions.append(phone_number, "user", user_message)
+        sessions.append(phone_number, "assistant", reply)
+    
+    async def record_exchange(phone_number: str, user_message: str, reply: str):
+        """Update session history"""
+        await asyncio.to_thread(append_exchange, phone_number, user_message, reply)
+    
+    async def remember_exchange(request: ChatRequest, reply: str):
+        """Record a reply produced outside the agent, keeping its thread consistent"""
+        await agent.aupdate_state(
+            {"configurable": {"thread_id": request.phone_number}},
+            {"messages": [HumanMessage(content=request.message), AIMessage(content=reply)]},
+            as_node="assistant"
+        )
+        await record_exchange(request.phone_number, request.message, reply)
+    
+    async def answer_fast_path(request: ChatRequest):
+        """
+        Try to answer without running the agent: small talk via the intent
+        router, then first-turn questions via the FAQ index and the answer
+        cache (later turns may depend on the conversation, so they go to the agent).
+        Returns (ChatResponse or None, query vector or None).
+        """
+        first_turn = not await asyncio.to_thread(sessions.message_count, request.phone_number)
+        use_faq = faq_index is not None and first_turn
+        use_cache = answer_cache is not None and first_turn
+        if intent_router is None and not use_faq and not use_cache:
+            return None, None
+        
+        query_vector = await get_retriever().aembed_query(request.message)
+        
+        if intent_router is not None:
+            routed = intent_router.classify(request.message, query_vector)
+            if routed is not None:
+                await remember_exchange(request, routed["response"])
+                return ChatResponse(
+                    response=routed["response"],
+                    phone_number=request.phone_number
+                ), None
+        
+        if use_faq:
+            entry = faq_index.match(query_vector)
+            if entry is not None:
+                reply, sources = render_answer(entry)
+                reply = format_response(reply)
+                await remember_exchange(request, reply)
+                return ChatResponse(
+                    response=reply,
+                    phone_number=request.phone_number,
+                    used_retrieval=True,
+                    sources=sources
+                ), None
+        
+        if not use_cache:
+            return None, None
+        
+        cached = answer_cache.lookup(query_vector)
+        if cached is None:
+            return None, query_vector
+        
+        await remember_exchange(request, cached["response"])
+        
+        return ChatResponse(
+            response=cached["response"],
+            phone_number=request.phone_number,
+            used_retrieval=cached["used_retrieval"],
+            sources=cached["sources"]
+        ), query_vector
+    
+    def cache_answer(request: ChatRequest, query_vector, response: str, used_retrieval: bool, sources: List[Dict]):
+        """Cache grounded first-turn answers"""
+        if answer_cache is not None and query_vector is not None and used_retrieval:
+            answer_cache.store(request.message, query_vector, response, sources, used_retrieval)
+    
     @app.get("/")
     async def root():
         """Health check endpoint"""
@@ -434,82 +672,47 @@ def create_app(agent, nelfund_retriever, llm):
             "service": "NELFUND Student Loan Navigator",
             "status": "operational" if agent else "initializing",
             "version": "1.0.0",
-            "endpoints": ["/chat", "/sessions", "/reset"],
+            "endpoints": ["/chat", "/chat/stream", "/sessions", "/reset"],
             "ai_provider": "Google Gemini AI (Chat) + Sentence Transformers (Embeddings)",
             "embedding_model": config.SENTENCE_TRANSFORMER_MODEL
         }
     
+    @app.get("/ready")
+    async def readiness():
+        """Readiness probe: per-component startup state and stage timings"""
+        snapshot = startup.snapshot() if startup else {"ready": agent is not None}
+        ready = agent is not None and snapshot["ready"]
+        if startup is not None and startup.failed:
+            # Terminal: retrying will not help, the process needs a restart
+            return JSONResponse({**snapshot, "ready": False, "failed": True}, status_code=500)
+        headers = None if ready else {"Retry-After": str(config.STARTUP_RETRY_AFTER_SECONDS)}
+        return JSONResponse({**snapshot, "ready": ready, "failed": False},
+                            status_code=200 if ready else 503, headers=headers)
+    
     @app.post("/chat", response_model=ChatResponse)
     async def chat(request: ChatRequest):
         """Main chat endpoint"""
         if agent is None:
-            raise HTTPException(status_code=503, detail="Service initializing")
+            raise not_ready()
         
+        await ensure_session(request.phone_number)
         try:
-            # Get or create session
-            if request.phone_number not in sessions:
-                sessions[request.phone_number] = {
-                    "created_at": datetime.now(),
-                    "messages": []
-                }
+            fast_response, query_vector = await answer_fast_path(request)
+            if fast_response is not None:
+                return fast_response
             
             # Invoke agent
-            result = agent.invoke(
-                {"messages": [HumanMessage(content=request.message)]},
-                config={"configurable": {"thread_id": request.phone_number}}
-            )
+            async with chat_slots:
+                result = await agent.ainvoke(
+                    {"messages": [HumanMessage(content=request.message)]},
+                    config={"configurable": {"thread_id": request.phone_number}}
+                )
             
-            # Extract response and sources
-            final_response = None
-            used_retrieval = False
-            sources = []
-            
-            for message in result["messages"]:
-                if isinstance(message, AIMessage):
-                    if hasattr(message, 'tool_calls') and message.tool_calls:
-                        used_retrieval = True
-                        # Extract sources from tool calls
-                        for tool_call in message.tool_calls:
-                            if 'args' in tool_call and 'query' in tool_call['args']:
-                                # Retrieve the actual documents to extract sources
-                                retrieved_docs = nelfund_retriever.search(tool_call['args']['query'])
-                                for doc in retrieved_docs:
-                                    source_entry = {
-                                        "source": doc.get("source", "Unknown"),
-                                        "page": doc.get("page", "N/A"),
-                                        "content_preview": doc.get("content", "")[:200] + "..."
-                                    }
-                                    if source_entry not in sources:
-                                        sources.append(source_entry)
-                    
-                    final_response = extract_content_from_ai_message(message)
-            
-            if not final_response:
-                final_response = "I apologize, I couldn't generate a response. Please try rephrasing your question."
-            
-            # Format output - clean escape sequences and improve readability
-            final_response = re.sub(r"\*\*(.*?)\*\*", r"\1", final_response)  # Remove bold markdown
-            final_response = re.sub(r"[\n•*-]+", ". ", final_response)  # Replace newlines and bullets with periods
-            final_response = re.sub(r"\s{2,}", " ", final_response).strip()  # Remove extra spaces
-            final_response = re.sub(r"\.\s*\.", ".", final_response)  # Fix double periods
-            final_response = re.sub(r"\s+([.,!?])", r"\1", final_response)  # Fix spacing before punctuation
-            
-            # Ensure proper sentence endings
-            if final_response and not final_response[-1] in '.!?':
-                final_response += "."
-            
-            # Update session history
-            sessions[request.phone_number]["messages"].append({
-                "role": "user",
-                "content": request.message,
-                "timestamp": datetime.now()
-            })
-            
-            sessions[request.phone_number]["messages"].append({
-                "role": "assistant",
-                "content": final_response,
-                "timestamp": datetime.now()
-            })
+            # Extract response and sources from this turn only
+            final_response, used_retrieval, sources = summarize_turn(result["messages"])
+            
+            await record_exchange(request.phone_number, request.message, final_response)
+            cache_answer(request, query_vector, final_response, used_retrieval, sources)
             
             return ChatResponse(
                 response=final_response,
@@ -524,60 +727,161 @@ def create_app(agent, nelfund_retriever, llm):
             traceback.print_exc()
             raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     
+    @app.post("/chat/stream")
+    async def chat_stream(request: ChatRequest):
+        """
+        Streaming chat endpoint (Server-Sent Events).
+        Emits retrieval_start / retrieval_end / token events while the agent
+        runs, then a final "done" event carrying the same fields as /chat.
+        Token deltas are raw model output; "done" has the formatted reply.
+        """
+        if agent is None:
+            raise not_ready()
+        
+        await ensure_session(request.phone_number)
+        run_config = {"configurable": {"thread_id": request.phone_number}}
+        
+        async def event_stream():
+            try:
+                fast_response, query_vector = await answer_fast_path(request)
+                if fast_response is not None:
+                    yield sse_event("done", fast_response.model_dump(mode="json"))
+                    return
+                
+                async with chat_slots:
+                    async for event in agent.astream_events(
+                        {"messages": [HumanMessage(content=request.message)]},
+                        config=run_config,
+                        version="v2"
+                    ):
+                        kind = event["event"]
+                        
+                        if kind == "on_tool_start" and event["name"] == "retrieve_nelfund_info":
+                            query = (event["data"].get("input") or {}).get("query", "")
+                            yield sse_event("retrieval_start", {"query": query})
+                        
+                        elif kind == "on_tool_end" and event["name"] == "retrieve_nelfund_info":
+                            output = event["data"].get("output")
+                            yield sse_event("retrieval_end", {"sources": collect_sources([output])})
+                        
+                        elif kind == "on_chat_model_stream":
+                            text = extract_content_from_ai_message(event["data"]["chunk"])
+                            if text:
+                                yield sse_event("token", {"text": text})
+                    
+                    state = await agent.aget_state(run_config)
+                
+                final_response, used_retrieval, sources = summarize_turn(state.values["messages"])
+                await record_exchange(request.phone_number, request.message, final_response)
+                cache_answer(request, query_vector, final_response, used_retrieval, sources)
+                
+                yield sse_event("done", ChatResponse(
+                    response=final_response,
+                    phone_number=request.phone_number,
+                    used_retrieval=used_retrieval,
+                    sources=sources
+                ).model_dump(mode="json"))
+                
+            except Exception as e:
+                print(f"❌ Error in chat stream: {e}")
+                yield sse_event("error", {"detail": f"Internal server error: {str(e)}"})
+        
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
     @app.get("/sessions/{phone_number}")
     async def get_session(phone_number: str):
         """Get conversation history for a session"""
-        if phone_number not in sessions:
+        session = await asyncio.to_thread(sessions.get, phone_number)
+        if session is None:
             raise HTTPException(status_code=404, detail="Session not found")
         
         return {
             "phone_number": phone_number,
-            "created_at": sessions[phone_number]["created_at"],
-            "messages": sessions[phone_number]["messages"],
-            "message_count": len(sessions[phone_number]["messages"])
+            "created_at": session["created_at"],
+            "messages": session["messages"],
+            "message_count": len(session["messages"])
         }
     
     @app.post("/reset/{phone_number}")
     async def reset_session(phone_number: str):
-        """Reset a conversation session"""
-        if phone_number in sessions:
-            sessions[phone_number]["messages"] = []
+        """Reset a conversation session (history and the agent's thread state)"""
+        await asyncio.to_thread(sessions.reset, phone_number)
+        # Otherwise the agent would still see the old conversation while the
+        # fast path treats the next message as a first turn
+        if checkpointer is not None:
+            await checkpointer.adelete_thread(phone_number)
         return {"status": "session reset", "phone_number": phone_number}
     
     @app.get("/status")
     async def system_status():
         """System status and statistics"""
+        session_stats = await asyncio.to_thread(sessions.stats)
         return {
             "status": "operational" if agent else "error",
-            "sessions_active": len(sessions),
-            "total_messages": sum(len(s["messages"]) for s in sessions.values()),
+            "max_concurrent_chats": config.MAX_CONCURRENT_CHATS,
+            "sessions_active": session_stats["sessions_active"],
+            "total_messages": session_stats["total_messages"],
+            "sessions": session_stats,
             "vector_store": "loaded" if nelfund_retriever else "not_loaded",
+            "answer_cache": answer_cache.stats() if answer_cache else "disabled",
+            "retrieval_cache": cache_stats(),
+            "reranker": rerank_stats(),
+            "context_compression": context_compression_stats(),
+            "checkpoints": checkpointer.stats() if hasattr(checkpointer, "stats") else "unbounded",
+            "history": history_stats(),
+            "intent_router": intent_router.stats() if intent_router else "disabled",
+            "faq_index": faq_index.stats() if faq_index else "disabled",
             "agent": "ready" if agent else "not_ready",
             "ai_provider": "Google Gemini AI (Chat)",
             "embedding_model": config.SENTENCE_TRANSFORMER_MODEL,
             "cost_saving": "Yes - Sentence Transformers used for embeddings (no API calls)"
         }
     
-    @app.post("/reload-embeddings")
+    def on_index_swap(path: str):
+        """Point the FAQ index and answer cache at a freshly swapped-in generation"""
+        nonlocal faq_index
+        if config.FAQ_ENABLED:
+            faq_index = FAQIndex.load(path, threshold=config.FAQ_MATCH_THRESHOLD)
+        
+        # Cached answers may cite chunks that no longer exist
+        if answer_cache is not None:
+            answer_cache.clear()
+    
+    index_reloader = IndexReloader(on_swap=on_index_swap)
+    
+    @app.post("/reload-embeddings", status_code=202)
     async def reload_embeddings():
-        """Reload the vector store with updated documents"""
-        try:
-            from vectorstore import create_vector_store
-            from retriever import NelfundRetriever, set_retriever
-            
-            vectorstore = create_vector_store()
-            new_retriever = NelfundRetriever(vectorstore)
-            set_retriever(new_retriever)
-            
-            return {"status": "success", "message": "Embeddings reloaded successfully"}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+        """
+        Rebuild the index in the background as a new generation; the live
+        index keeps serving until the new one is validated and swapped in.
+        Poll GET /reload-embeddings/{job_id} for progress.
+        """
+        if agent is None:
+            raise not_ready()
+        if config.INDEX_LOAD_ONLY:
+            raise HTTPException(
+                status_code=409,
+                detail="Index is load-only on this server; build a new artifact with build_index.py"
+            )
+        return index_reloader.start()
+    
+    @app.get("/reload-embeddings/{job_id}")
+    async def reload_status(job_id: str):
+        """Progress of a background index rebuild"""
+        job = index_reloader.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Reload job not found")
+        return job
     
     @app.post("/debug-gemini")
     async def debug_gemini(message: str):
         """Debug endpoint to see Gemini response format"""
         if llm is None:
-            raise HTTPException(status_code=503, detail="LLM not initialized")
+            raise not_ready()
         
         try:
             from langchain_core.messages import SystemMessage, HumanMessage
@@ -587,7 +891,7 @@ def create_app(agent, nelfund_retriever, llm):
                 HumanMessage(content=message)
             ]
             
-            response = llm.invoke(test_messages)
+            response = await llm.ainvoke(test_messages)
             
             return {
                 "raw_response": str(response),
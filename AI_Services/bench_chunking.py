@@ -0,0 +1,57 @@
+"""
+bench_chunking.py
+Compare splitter modes: chunk count, tokens per retrieval and hit rate
+
+Usage: python bench_chunking.py [--k 5]
+"""
+import argparse
+import numpy as np
+from config import config
+from documents import load_documents, create_sample_documents, split_documents
+from ingest import chunk_ids
+from vectorstore import create_embeddings, VectorIndex
+
+
+# (question, phrase that a useful retrieval must contain), lower-case
+EVAL_SET = [
+    ("Who is eligible for a NELFUND loan?", "eligib"),
+    ("How do I apply for the student loan?", "apply"),
+    ("When does repayment start?", "repayment"),
+    ("Is the loan interest free?", "interest"),
+    ("What documents do I need to apply?", "admission"),
+    ("Can a student in a private university apply?", "public"),
+    ("What happens if I can't find a job after graduation?", "employ"),
+    ("Who can be a guarantor?", "guarantor"),
+    ("Does the loan cover upkeep allowance?", "upkeep"),
+    ("What is the role of institutions in the loan process?", "institution"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--k", type=int, default=config.RETRIEVAL_K)
+    args = parser.parse_args()
+
+    documents = load_documents(config.DOCUMENT_PATHS) or create_sample_documents()
+    embeddings = create_embeddings()
+    query_vectors = embeddings.embed_documents([q for q, _ in EVAL_SET])
+
+    print(f"\n{'mode':<11} {'chunks':>7} {'avg tok/chunk':>14} {'avg tok/retrieval':>18} {'hit rate':>9}")
+    for mode in ("recursive", "structured"):
+        splits = split_documents(documents, mode=mode)
+        index = VectorIndex(embeddings)
+        index.add_embeddings(chunk_ids(splits), embeddings.embed_documents([d.page_content for d in splits]), splits)
+
+        chunk_tokens = [len(d.page_content) // 4 for d in splits]
+        retrieval_tokens, hits = [], 0
+        for (question, phrase), vector in zip(EVAL_SET, query_vectors):
+            results = index.similarity_search_by_vector(vector, k=args.k)
+            retrieval_tokens.append(sum(len(d.page_content) // 4 for d in results))
+            hits += any(phrase in d.page_content.lower() for d in results)
+
+        print(f"{mode:<11} {len(splits):>7} {np.mean(chunk_tokens):>14.1f} "
+              f"{np.mean(retrieval_tokens):>18.1f} {hits / len(EVAL_SET):>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+bench_embeddings.py
+Per-query latency, ingest throughput and parity of the embedding runtimes
+
+Usage: python bench_embeddings.py [--queries 100] [--backends torch onnx onnx-int8]
+"""
+import argparse
+import time
+import numpy as np
+from config import config
+from documents import load_documents, create_sample_documents, split_documents
+from vectorstore import create_embeddings, embedding_parity
+
+
+BACKENDS = {
+    "torch": ("torch", False),
+    "onnx": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+QUERIES = [
+    "Who is eligible for a NELFUND loan?",
+    "How do I apply for the student loan?",
+    "When does repayment start?",
+    "What documents do I need to apply?",
+    "Is there interest on the loan?",
+    "Can students in private universities apply?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    args = parser.parse_args()
+
+    documents = load_documents(config.DOCUMENT_PATHS) or create_sample_documents()
+    texts = [doc.page_content for doc in split_documents(documents)]
+
+    reference = create_embeddings(backend="torch")
+    rows = []
+    for name in args.backends:
+        backend, quantized = BACKENDS[name]
+        embeddings = reference if name == "torch" else create_embeddings(backend=backend, quantized=quantized)
+
+        embeddings.embed_query(QUERIES[0])  # warm-up
+        timings = []
+        for i in range(args.queries):
+            start = time.perf_counter()
+            embeddings.embed_query(QUERIES[i % len(QUERIES)])
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        embeddings.embed_documents(texts)
+        ingest_seconds = time.perf_counter() - start
+
+        parity = embedding_parity(reference, embeddings, texts[:200])
+        rows.append((
+            name,
+            float(np.percentile(timings, 50)) * 1000,
+            float(np.percentile(timings, 95)) * 1000,
+            len(texts) / ingest_seconds,
+            parity["min_cosine"],
+            parity["mean_cosine"],
+        ))
+
+    print(f"\n📊 {len(texts)} chunks, {args.queries} queries")
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'chunks/s':>10} {'min cos':>9} {'mean cos':>9}")
+    for name, p50, p95, throughput, min_cos, mean_cos in rows:
+        print(f"{name:<10} {p50:>8.2f} {p95:>8.2f} {throughput:>10.1f} {min_cos:>9.5f} {mean_cos:>9.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+bench_imports.py
+Import-time profile of the service, with a regression budget
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+prints the slowest top-level packages, and exits non-zero if the module
+takes longer than the budget to import.
+
+Usage: python bench_imports.py [--module api] [--budget-ms 3000] [--runs 3] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Tuple
+from config import config
+
+
+def profile_import(module: str) -> Tuple[float, Dict[str, float]]:
+    """Return (cumulative ms for `module`, self ms per top-level package)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    total_ms = 0.0
+    by_package = defaultdict(float)
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == module:
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, dict(by_package)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--module", default="api")
+    parser.add_argument("--budget-ms", type=float, default=config.IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # Best of N runs: the first one also pays for cold disk caches
+    runs = [profile_import(args.module) for _ in range(args.runs)]
+    total_ms, by_package = min(runs, key=lambda run: run[0])
+
+    print(f"\n📦 import {args.module}: {total_ms:.0f} ms (best of {args.runs})")
+    print(f"{'package':<32} {'self ms':>9}")
+    for package, ms in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{package:<32} {ms:>9.1f}")
+
+    if total_ms > args.budget_ms:
+        print(f"\n❌ import {args.module} took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        return 1
+    print(f"\n✅ Within the {args.budget_ms:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+bench_vector_index.py
+Query latency of the Chroma store vs the NumPy VectorIndex on the same corpus
+
+Usage: python bench_vector_index.py [--queries 200] [--k 5] [--fetch-k 10]
+"""
+import argparse
+import tempfile
+import time
+from typing import Callable, List
+import numpy as np
+from langchain_chroma import Chroma
+from config import config
+from documents import load_documents, create_sample_documents, split_documents
+from ingest import chunk_ids
+from vectorstore import create_embeddings, VectorIndex
+
+
+QUERIES = [
+    "Who is eligible for a NELFUND loan?",
+    "How do I apply for the student loan?",
+    "When does repayment start?",
+    "What documents do I need to apply?",
+    "Is there interest on the loan?",
+    "Can students in private universities apply?",
+    "What happens if I don't get a job after graduation?",
+    "What does section 12 of the Act say?",
+]
+
+
+def percentile_ms(samples: List[float], pct: float) -> float:
+    return float(np.percentile(samples, pct)) * 1000
+
+
+def time_queries(search: Callable, vectors: List[List[float]], runs: int) -> List[float]:
+    """Run `search` over the query vectors round-robin and return per-call seconds"""
+    timings = []
+    for i in range(runs):
+        vector = vectors[i % len(vectors)]
+        start = time.perf_counter()
+        search(vector)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=config.RETRIEVAL_K)
+    parser.add_argument("--fetch-k", type=int, default=config.RETRIEVAL_FETCH_K)
+    args = parser.parse_args()
+
+    documents = load_documents(config.DOCUMENT_PATHS) or create_sample_documents()
+    splits = split_documents(documents)
+    ids = chunk_ids(splits)
+    embeddings = create_embeddings()
+
+    # Embed once and load the same vectors into both backends
+    vectors = embeddings.embed_documents([doc.page_content for doc in splits])
+    query_vectors = [embeddings.embed_query(q) for q in QUERIES]
+
+    with tempfile.TemporaryDirectory() as chroma_dir, tempfile.TemporaryDirectory() as numpy_dir:
+        chroma = Chroma(embedding_function=embeddings, persist_directory=chroma_dir)
+        chroma._collection.add(
+            ids=ids,
+            embeddings=vectors,
+            documents=[doc.page_content for doc in splits],
+            metadatas=[doc.metadata for doc in splits]
+        )
+
+        index = VectorIndex(embeddings, persist_directory=numpy_dir)
+        index.add_embeddings(ids, vectors, splits)
+        index.persist()
+        index = VectorIndex(embeddings, persist_directory=numpy_dir)  # reopen memory-mapped
+
+        print(f"\n📊 {len(splits)} chunks, {args.queries} queries, k={args.k}, fetch_k={args.fetch_k}")
+        print(f"{'backend':<8} {'search':<10} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, store in (("chroma", chroma), ("numpy", index)):
+            searches = {
+                "top-k": lambda v: store.similarity_search_by_vector(v, k=args.k),
+                "mmr": lambda v: store.max_marginal_relevance_search_by_vector(
+                    v, k=args.k, fetch_k=args.fetch_k, lambda_mult=config.RETRIEVAL_LAMBDA_MULT
+                ),
+            }
+            for label, search in searches.items():
+                search(query_vectors[0])  # warm-up
+                timings = time_queries(search, query_vectors, args.queries)
+                print(f"{name:<8} {label:<10} {percentile_ms(timings, 50):>9.3f} {percentile_ms(timings, 95):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+bm25.py
+In-memory BM25 inverted index for lexical retrieval
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+from langchain_core.documents import Document
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "if", "in", "is", "it", "me", "my", "of", "on", "or",
+    "the", "to", "what", "when", "where", "which", "who", "will", "with", "you"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens plus adjacent-word bigrams, so exact phrases
+    like "section 12" or "level 12" score higher than the words apart.
+    """
+    words = [w for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents: List[Document] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._doc_lengths: List[int] = []
+        self._idf: Dict[str, float] = {}
+        self._avg_length = 0.0
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore, **kwargs) -> "BM25Index":
+        """Build the index from every chunk stored in the vector store"""
+        data = vectorstore.get(include=["documents", "metadatas"])
+        documents = [
+            Document(page_content=text, metadata=metadata or {}, id=doc_id)
+            for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+        ]
+        index = cls(**kwargs)
+        index.build(documents)
+        return index
+
+    def build(self, documents: List[Document]):
+        postings = defaultdict(list)
+        lengths = []
+        for doc_index, doc in enumerate(documents):
+            terms = Counter(tokenize(doc.page_content))
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                postings[term].append((doc_index, tf))
+
+        n = len(documents)
+        self.documents = documents
+        self._postings = dict(postings)
+        self._doc_lengths = lengths
+        self._avg_length = (sum(lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """Top-k chunks by BM25 score (only chunks sharing a query term)"""
+        if not self.documents:
+            return []
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            plist = self._postings.get(term)
+            if not plist:
+                continue
+            idf = self._idf[term]
+            for doc_index, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_index] / self._avg_length)
+                scores[doc_index] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.documents[doc_index], score) for doc_index, score in top]
@@ -0,0 +1,73 @@
+"""
+build_index.py
+Offline index build: parse, chunk and embed the documents into a
+versioned index artifact that API workers open with INDEX_LOAD_ONLY=true
+
+Usage: python build_index.py [--output DIR] [--fresh] [--activate] [--keep N]
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import time
+from config import config
+from vectorstore import create_vector_store, active_index_path, read_index_info, index_write_lock
+from index_reload import new_generation_path, activate_generation, collect_garbage
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--output", help="artifact directory (default: a new generation "
+                                         f"under {config.INDEX_GENERATIONS_PATH})")
+    parser.add_argument("--fresh", action="store_true",
+                        help="embed everything instead of starting from the active index")
+    parser.add_argument("--activate", action="store_true",
+                        help="make the artifact the active generation for servers started afterwards")
+    parser.add_argument("--keep", type=int, default=config.INDEX_GENERATIONS_KEEP,
+                        help="generations to keep when --activate garbage-collects old ones")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    output = args.output or new_generation_path()
+    if os.path.exists(output) and os.listdir(output):
+        print(f"❌ Output directory {output} is not empty")
+        return 1
+
+    with index_write_lock():
+        source = active_index_path()
+        if not args.fresh and os.path.isdir(source):
+            print(f"♻️ Starting from the active index at {source}")
+            shutil.copytree(source, output, dirs_exist_ok=True, ignore=shutil.ignore_patterns("*.tmp"))
+    os.makedirs(output, exist_ok=True)
+
+    start = time.perf_counter()
+    try:
+        create_vector_store(persist_directory=output)
+    except Exception as e:
+        print(f"❌ Index build failed: {e}")
+        shutil.rmtree(output, ignore_errors=True)
+        return 1
+
+    info = read_index_info(output)
+    if not info or not info["chunks"]:
+        print("❌ Index build produced no chunks")
+        shutil.rmtree(output, ignore_errors=True)
+        return 1
+
+    print(f"\n📦 Index artifact: {output}")
+    print(f"   Chunks: {info['chunks']}, built in {time.perf_counter() - start:.1f}s")
+
+    if args.activate:
+        if os.path.dirname(os.path.abspath(output)) != os.path.abspath(config.INDEX_GENERATIONS_PATH):
+            print(f"❌ --activate needs the artifact inside {config.INDEX_GENERATIONS_PATH}")
+            return 1
+        activate_generation(output)
+        removed = collect_garbage(args.keep)
+        print(f"✅ Active generation: {os.path.basename(output)} ({removed} old generations removed)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+cache.py
+Thread-safe LRU cache with hit/miss counters, shared by the retriever
+caches and the semantic answer cache
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class LRUCache:
+    """Small thread-safe LRU cache with hit/miss counters"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _hit(self, key) -> Any:
+        """Count a hit and mark `key` most recently used (caller holds the lock)"""
+        self._data.move_to_end(key)
+        self.hits += 1
+        return self._data[key]
+    
+    def _miss(self):
+        """Count a miss (caller holds the lock)"""
+        self.misses += 1
+    
+    def get(self, key) -> Optional[Any]:
+        with self._lock:
+            if key in self._data:
+                return self._hit(key)
+            self._miss()
+            return None
+    
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+            }
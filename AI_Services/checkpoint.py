@@ -0,0 +1,425 @@
+"""
+checkpoint.py
+Conversation checkpointers for the LangGraph agent
+"""
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from config import config
+from db import get_database
+
+
+class CompactingMemorySaver(MemorySaver):
+    """
+    MemorySaver that keeps only the newest `keep_last` checkpoints per
+    thread and evicts threads that have been idle for `idle_ttl_seconds`.
+
+    MemorySaver stores a checkpoint for every super-step, each referencing
+    its own copy of the message list, so memory grows roughly
+    quadratically with conversation length. Resuming a thread only needs
+    the latest checkpoint (and its pending writes).
+    """
+
+    def __init__(self, keep_last: int = 1, idle_ttl_seconds: float = None,
+                 sweep_interval_seconds: float = 60, **kwargs):
+        super().__init__(**kwargs)
+        self.keep_last = max(1, keep_last)
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._last_active: Dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()
+        self.checkpoints_pruned = 0
+        self.threads_evicted = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+            self._last_active[thread_id] = time.monotonic()
+            self._compact(thread_id, checkpoint_ns)
+            self._maybe_evict_idle()
+        return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            return super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str):
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._last_active.pop(thread_id, None)
+
+    def _compact(self, thread_id: str, checkpoint_ns: str):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_last:
+            return
+
+        # Checkpoint IDs are time-ordered (uuid6), so sorting keeps the newest
+        ordered = sorted(checkpoints)
+        dropped = ordered[:-self.keep_last]
+
+        referenced = set()
+        for checkpoint_id in ordered[-self.keep_last:]:
+            saved = self.serde.loads_typed(checkpoints[checkpoint_id][0])
+            referenced.update(saved["channel_versions"].items())
+
+        for checkpoint_id in dropped:
+            saved = self.serde.loads_typed(checkpoints.pop(checkpoint_id)[0])
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            # Channel values live in blobs keyed by version; drop the ones
+            # no retained checkpoint points at
+            for channel, version in saved["channel_versions"].items():
+                if (channel, version) not in referenced:
+                    self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+        self.checkpoints_pruned += len(dropped)
+
+    def _maybe_evict_idle(self):
+        if not self.idle_ttl_seconds:
+            return
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval_seconds:
+            return
+        self._last_sweep = now
+
+        idle = [t for t, last in self._last_active.items() if now - last > self.idle_ttl_seconds]
+        for thread_id in idle:
+            self.delete_thread(thread_id)
+        self.threads_evicted += len(idle)
+
+    def stats(self) -> Dict:
+        """Threads, checkpoints and serialized bytes currently held"""
+        with self._lock:
+            checkpoint_bytes = sum(
+                len(saved[1]) + len(meta[1])
+                for namespaces in self.storage.values()
+                for checkpoints in namespaces.values()
+                for saved, meta, _ in checkpoints.values()
+            )
+            blob_bytes = sum(len(blob[1]) for blob in self.blobs.values())
+            write_bytes = sum(
+                len(value[2][1])
+                for writes in self.writes.values()
+                for value in writes.values()
+            )
+            return {
+                "backend": "compacting_memory",
+                "threads": len(self.storage),
+                "checkpoints": sum(
+                    len(checkpoints)
+                    for namespaces in self.storage.values()
+                    for checkpoints in namespaces.values()
+                ),
+                "bytes_held": checkpoint_bytes + blob_bytes + write_bytes,
+                "checkpoints_pruned": self.checkpoints_pruned,
+                "threads_evicted": self.threads_evicted
+            }
+
+
+class SQLiteSaver(BaseCheckpointSaver):
+    """
+    Durable checkpointer on the shared local SQLite database, so any
+    worker can resume any thread and conversations survive restarts.
+    Like CompactingMemorySaver it keeps only the newest `keep_last`
+    checkpoints per thread. Async methods run the (short) queries on a
+    worker thread so the event loop is never blocked on disk I/O.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        type TEXT,
+        checkpoint BLOB,
+        metadata_type TEXT,
+        metadata BLOB,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_checkpoints_updated_at ON checkpoints(updated_at);
+    CREATE TABLE IF NOT EXISTS checkpoint_writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT,
+        value BLOB,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    );
+    """
+
+    _COLUMNS = (
+        "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+        "type, checkpoint, metadata_type, metadata"
+    )
+
+    def __init__(self, path: str, keep_last: int = 1, serde=None):
+        super().__init__(serde=serde)
+        self.db = get_database(path)
+        self.keep_last = max(1, keep_last)
+        self.db.executescript(self.SCHEMA)
+
+    def _pending_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        rows = self.db.conn.execute(
+            "SELECT task_id, channel, type, value FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        return [
+            (task_id, channel, self.serde.loads_typed((type_, value)))
+            for task_id, channel, type_, value in rows
+        ]
+
+    def _to_tuple(self, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, blob, mtype, mblob = row
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint=self.serde.loads_typed((type_, blob)),
+            metadata=self.serde.loads_typed((mtype, mblob)),
+            parent_config={"configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": parent_id,
+            }} if parent_id else None,
+            pending_writes=self._pending_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        with self.db.lock:
+            if checkpoint_id:
+                row = self.db.conn.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self.db.conn.execute(
+                    f"SELECT {self._COLUMNS} FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns)
+                ).fetchone()
+            return self._to_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            checkpoint_id = get_checkpoint_id(config)
+            if checkpoint_id:
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.db.lock:
+            rows = self.db.conn.execute(
+                f"SELECT {self._COLUMNS} FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params
+            ).fetchall()
+            tuples = []
+            for row in rows:
+                checkpoint_tuple = self._to_tuple(row)
+                if filter and not all(
+                    checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()
+                ):
+                    continue
+                tuples.append(checkpoint_tuple)
+                if limit is not None and len(tuples) >= limit:
+                    break
+        yield from tuples
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        mtype, mblob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.db.lock, self.db.conn as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "type, checkpoint, metadata_type, metadata, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], parent_id,
+                 type_, blob, mtype, mblob, time.time())
+            )
+            # Each checkpoint holds the full state, so older ones are redundant
+            keep = (
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT ?"
+            )
+            args = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last)
+            conn.execute(
+                f"DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                f"AND checkpoint_id NOT IN ({keep})",
+                args
+            )
+            conn.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                f"AND checkpoint_id NOT IN ({keep})",
+                args
+            )
+
+        return {"configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id,
+                WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path
+            ))
+
+        # Special channels (errors, interrupts) overwrite; regular writes are idempotent
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        with self.db.lock, self.db.conn as conn:
+            conn.executemany(
+                f"{verb} INTO checkpoint_writes "
+                "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.db.lock, self.db.conn as conn:
+            conn.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def stats(self) -> Dict:
+        """Threads, checkpoints and bytes stored"""
+        with self.db.lock:
+            threads, checkpoints, checkpoint_bytes = self.db.conn.execute(
+                "SELECT COUNT(DISTINCT thread_id), COUNT(*), "
+                "COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+            ).fetchone()
+            write_bytes = self.db.conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM checkpoint_writes"
+            ).fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "path": self.db.path,
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "bytes_held": checkpoint_bytes + write_bytes
+        }
+
+
+def create_checkpointer():
+    """Create the checkpointer selected in config"""
+    if config.CHECKPOINTER == "memory":
+        return MemorySaver()
+
+    if config.CHECKPOINTER == "sqlite":
+        return SQLiteSaver(config.SQLITE_PATH, keep_last=config.CHECKPOINT_KEEP_LAST)
+
+    if config.CHECKPOINTER != "compacting":
+        print(f"⚠️ Unknown CHECKPOINTER '{config.CHECKPOINTER}', using compacting memory")
+
+    return CompactingMemorySaver(
+        keep_last=config.CHECKPOINT_KEEP_LAST,
+        idle_ttl_seconds=config.CHECKPOINT_IDLE_TTL_SECONDS
+    )
@@ -0,0 +1,143 @@
+"""
+compression.py
+Extractive compression of retrieved chunks before they reach the model
+"""
+import itertools
+import re
+import threading
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+
+
+# Sentence ends, blank lines, and the start of bullet / numbered list items
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n|\n(?=\s*(?:[-•*]|\d{1,2}[.)])\s)")
+
+_stats = {"requests": 0, "chars_in": 0, "chars_out": 0, "last_ratio": None}
+_stats_lock = threading.Lock()
+
+
+def split_sentences(text: str, min_chars: int) -> List[str]:
+    """Sentences with whitespace collapsed; fragments shorter than min_chars join the previous one"""
+    sentences = []
+    for part in SENTENCE_BOUNDARY.split(text):
+        part = " ".join(part.split())
+        if not part:
+            continue
+        if sentences and len(part) < min_chars:
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences
+
+
+def _overlap(left: str, right: str, min_chars: int) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right` (0 if under min_chars)"""
+    if min(len(left), len(right)) < min_chars:
+        return 0
+    probe = right[:min_chars]
+    start = left.find(probe, max(0, len(left) - len(right)))
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(probe, start + 1)
+    return 0
+
+
+def merge_overlapping_chunks(results: List[Dict], min_overlap_chars: int) -> List[Dict]:
+    """
+    Join results that are neighbouring chunks of the same source and page:
+    a chunk whose start repeats the end of another (the splitter's overlap)
+    is appended to it without the repeated text, and a chunk contained in
+    another is dropped. The joined result takes the better-ranked position.
+    """
+    merged = [dict(result) for result in results]
+    changed = True
+    while changed:
+        changed = False
+        for i, j in itertools.permutations(range(len(merged)), 2):
+            left, right = merged[i], merged[j]
+            if (left.get("source"), left.get("page")) != (right.get("source"), right.get("page")):
+                continue
+            if right["content"] in left["content"]:
+                content = left["content"]
+            else:
+                size = _overlap(left["content"], right["content"], min_overlap_chars)
+                if not size:
+                    continue
+                content = left["content"] + right["content"][size:]
+            keep, drop = min(i, j), max(i, j)
+            merged[keep] = {**merged[keep], "content": content}
+            del merged[drop]
+            changed = True
+            break
+    return merged
+
+
+def compress_results(results: List[Dict], query_vector: List[float],
+                     embed_sentences: Callable[[List[str]], np.ndarray],
+                     budget_chars: int, min_sentence_chars: int,
+                     min_overlap_chars: int) -> Tuple[str, Dict]:
+    """
+    Keep the sentences most similar to the query, up to budget_chars.
+    Neighbouring chunks of the same page are first joined at their shared
+    overlap, sentences still repeated across results are kept once, and
+    kept sentences are shown per document in their original order.
+    Returns (formatted context, {"chars_in", "chars_out", "ratio"}).
+    """
+    chars_in = sum(len(result["content"]) for result in results)
+    results = merge_overlapping_chunks(results, min_overlap_chars)
+
+    sentences = []  # (result index, position, text)
+    seen = set()
+    for r, result in enumerate(results):
+        for position, sentence in enumerate(split_sentences(result["content"], min_sentence_chars)):
+            key = sentence.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            sentences.append((r, position, sentence))
+
+    if not sentences:
+        return "", {"chars_in": chars_in, "chars_out": 0, "ratio": 0.0}
+
+    vectors = embed_sentences([text for _, _, text in sentences])
+    scores = vectors @ np.asarray(query_vector, dtype=np.float32)
+
+    kept = []
+    used = 0
+    for i in np.argsort(-scores):
+        length = len(sentences[i][2])
+        if kept and used + length > budget_chars:
+            continue
+        kept.append(int(i))
+        used += length
+
+    by_result: Dict[int, List[Tuple[int, str]]] = {}
+    for i in kept:
+        r, position, text = sentences[i]
+        by_result.setdefault(r, []).append((position, text))
+
+    blocks = []
+    for r in sorted(by_result):
+        passage = " ".join(text for _, text in sorted(by_result[r]))
+        blocks.append(f"📄 Document {results[r]['id']}:\n{passage}\n")
+    content = "\n".join(blocks)
+
+    chars_out = sum(len(sentences[i][2]) for i in kept)
+    ratio = round(chars_out / chars_in, 3) if chars_in else 0.0
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["chars_in"] += chars_in
+        _stats["chars_out"] += chars_out
+        _stats["last_ratio"] = ratio
+
+    return content, {"chars_in": chars_in, "chars_out": chars_out, "ratio": ratio}
+
+
+def compression_stats() -> Dict:
+    """Running compression totals for /status"""
+    with _stats_lock:
+        return {
+            **_stats,
+            "avg_ratio": round(_stats["chars_out"] / _stats["chars_in"], 3) if _stats["chars_in"] else None
+        }
@@ -24,8 +24,20 @@ class Config:
         "data/Students-Loans-Access-to-Higher-Education-Act-2023.pdf"
     ]
     
-    # Vector store
+    # Vector store ("chroma" or "numpy" for the exact in-memory VectorIndex)
     VECTOR_STORE_PATH = "./nelfund_vectorstore"
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+    
+    # Index generations built by /reload-embeddings (blue/green swap)
+    INDEX_GENERATIONS_PATH = "./nelfund_index_generations"
+    INDEX_GENERATIONS_KEEP = 2
+    INDEX_GENERATIONS_GRACE_SECONDS = 600  # never garbage-collect a generation younger than this
+    RELOAD_MIN_CHUNK_RATIO = 0.5
+    RELOAD_SMOKE_QUERY = "NELFUND student loan eligibility"
+    RELOAD_JOBS_KEEP = 20
+    
+    # Open the prebuilt index (see build_index.py) without ingesting or embedding
+    INDEX_LOAD_ONLY = os.getenv("INDEX_LOAD_ONLY", "false").lower() == "true"
     
     # API Keys
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -34,13 +46,125 @@ class Config:
     GEMINI_MODEL = "gemini-3-flash-preview"
     SENTENCE_TRANSFORMER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
     
+    # Embedding runtime ("torch" or "onnx" via ONNX Runtime, optionally int8-quantized)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_ONNX_QUANTIZED = os.getenv("EMBEDDING_ONNX_QUANTIZED", "false").lower() == "true"
+    EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")  # empty: picked by CPU features
+    EMBEDDING_PARITY_CHECK = os.getenv("EMBEDDING_PARITY_CHECK", "false").lower() == "true"
+    EMBEDDING_PARITY_MIN_COSINE = 0.98
+    
+    # Document loading: parse worker processes and the parsed-page cache
+    LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "4"))
+    PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+    PAGE_CACHE_PATH = "./nelfund_page_cache"
+    
+    # Ingest embedding: chunks per write batch, model batch size, and worker
+    # processes (>1 uses a sentence-transformers multi-process pool; numpy backend only,
+    # Chroma embeds through its own add_documents)
+    INGEST_BATCH_SIZE = 256
+    EMBED_BATCH_SIZE = 32
+    EMBED_PROCESSES = int(os.getenv("EMBED_PROCESSES", "1"))
+    
     # Text splitting
     CHUNK_SIZE = 1500
     CHUNK_OVERLAP = 200
     
+    # "recursive" (fixed-size chunks) or "structured" (one chunk per FAQ
+    # question/answer or Act section, recursive elsewhere)
+    SPLITTER_MODE = os.getenv("SPLITTER_MODE", "recursive")
+    CHUNK_MAX_TOKENS = 400
+    STRUCTURED_MIN_BOUNDARIES = 3
+    STRUCTURED_MIN_CHARS = 120
+    
+    # Near-duplicate chunk elimination across sources (Jaccard over word 5-grams)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_THRESHOLD = 0.8
+    
     # Retrieval
     RETRIEVAL_K = 5
     RETRIEVAL_FETCH_K = 10
+    RETRIEVAL_LAMBDA_MULT = 0.7
+    
+    # "mmr" (dense only) or "hybrid" (BM25 + dense, reciprocal-rank fusion)
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+    HYBRID_CANDIDATES = 20
+    HYBRID_DENSE_WEIGHT = 1.0
+    HYBRID_LEXICAL_WEIGHT = 1.0
+    HYBRID_RRF_K = 60
+    
+    # Optional cross-encoder re-ranking (scores are logits; higher is more relevant)
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES = 15
+    RERANK_TOP_N = 3
+    RERANK_MIN_SCORE = 0.0
+    
+    QUERY_EMBEDDING_CACHE_SIZE = 1024
+    RESULT_CACHE_SIZE = 256
+    SENTENCE_EMBEDDING_CACHE_SIZE = 8192
+    
+    # Extractive compression of the retrieval tool output (keeps the sentences
+    # closest to the query, up to a character budget)
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_BUDGET_CHARS = 2400
+    COMPRESSION_MIN_SENTENCE_CHARS = 25
+    COMPRESSION_MIN_OVERLAP_CHARS = 40  # shortest shared text that joins neighbouring chunks
+    
+    # Conversation history sent to Gemini on each call
+    HISTORY_MAX_TURNS = 6
+    HISTORY_TOKEN_BUDGET = 6000
+    HISTORY_TOOL_OUTPUT_CHARS = 300
+    
+    # Budget for `import api` checked by bench_imports.py
+    IMPORT_BUDGET_MS = 3000
+    
+    # Retry-After (seconds) sent with 503s while components are still loading
+    STARTUP_RETRY_AFTER_SECONDS = 5
+    
+    # Concurrency (per worker)
+    MAX_CONCURRENT_CHATS = int(os.getenv("MAX_CONCURRENT_CHATS", "8"))
+    RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "2"))
+    
+    # Durable local state (used when SESSION_STORE / CHECKPOINTER is "sqlite")
+    SQLITE_PATH = os.getenv("SQLITE_PATH", "./nelfund_state.db")
+    SQLITE_BATCH_SIZE = 50
+    SQLITE_FLUSH_INTERVAL_SECONDS = 0.5
+    
+    # Sessions ("memory" or "sqlite")
+    SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+    SESSION_MAX_ENTRIES = 10000
+    SESSION_IDLE_TTL_SECONDS = 24 * 60 * 60
+    SESSION_GUEST_IDLE_TTL_SECONDS = 30 * 60
+    SESSION_MAX_MESSAGES = 100
+    SESSION_SWEEP_INTERVAL_SECONDS = 60
+    
+    # Agent checkpoints ("compacting" keeps only the newest per thread in memory,
+    # "sqlite" persists them, "memory" keeps every checkpoint)
+    CHECKPOINTER = os.getenv("CHECKPOINTER", "compacting")
+    CHECKPOINT_KEEP_LAST = 1
+    CHECKPOINT_IDLE_TTL_SECONDS = SESSION_IDLE_TTL_SECONDS
+    
+    # Local small-talk router (answers greetings etc. without Gemini)
+    ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+    ROUTER_THRESHOLD = 0.80
+    ROUTER_MAX_WORDS = 8
+    
+    # Official FAQ answers served directly when a question matches closely
+    FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() == "true"
+    FAQ_DOCUMENT_PATHS = [
+        "data/FAQ-GENERAL-STAKEHOLDERS-AND-MEDIA.pdf",
+        "data/FAQ-INSTITUTIONS.pdf",
+        "data/FAQ-PARENT-AND-GUARDIANS.pdf",
+        "data/FAQ-STUDENTS.pdf",
+        "data/NELFUND_FAQ.pdf"
+    ]
+    FAQ_MATCH_THRESHOLD = 0.90
+    
+    # Semantic answer cache (first-turn answers)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = 0.92
+    ANSWER_CACHE_MAX_ENTRIES = 512
+    ANSWER_CACHE_TTL_SECONDS = 6 * 60 * 60
 
 
 config = Config()
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+db.py
+Shared SQLite connection handling for durable local state
+"""
+import os
+import sqlite3
+import threading
+from typing import Dict
+
+
+class SQLiteDatabase:
+    """
+    One reused connection per database file, in WAL mode so several
+    workers can read while one writes. Callers serialize access with `lock`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.lock = threading.RLock()
+
+    def executescript(self, script: str):
+        with self.lock:
+            self.conn.executescript(script)
+
+
+_databases: Dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: str) -> SQLiteDatabase:
+    """Return the process-wide connection for `path`, opening it on first use"""
+    key = os.path.abspath(path)
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = SQLiteDatabase(path)
+        return _databases[key]
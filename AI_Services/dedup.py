@@ -0,0 +1,129 @@
+"""
+dedup.py
+Near-duplicate chunk detection across source documents (MinHash + LSH)
+"""
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Set, Tuple
+import numpy as np
+from langchain_core.documents import Document
+
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Universal hashing modulus (a Mersenne prime above the 32-bit shingle hashes)
+_PRIME = (1 << 61) - 1
+
+
+def shingles(text: str, size: int) -> Set[int]:
+    """32-bit hashes of overlapping word n-grams (the whole text if shorter)"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with a fixed seed, so results are stable across runs"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        # Coefficients below 2**31 keep a * x + b within uint64 for 32-bit x
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[int]) -> np.ndarray:
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        # (a * x + b) mod p for every permutation/shingle pair, minimised per permutation
+        hashed = (np.outer(self.a, values) + self.b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def near_duplicate_groups(texts: List[str], threshold: float, shingle_size: int = 5,
+                          num_perm: int = 64, bands: int = 16) -> List[List[int]]:
+    """
+    Groups of text indices whose shingle sets have Jaccard similarity of at
+    least `threshold` (directly or transitively). LSH banding proposes
+    candidate pairs; each is confirmed with the exact Jaccard score.
+    """
+    sets = [shingles(text, shingle_size) for text in texts]
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for i, shingle_set in enumerate(sets):
+        if not shingle_set:
+            continue
+        signature = hasher.signature(shingle_set)
+        for band in range(bands):
+            key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+            buckets.setdefault(key, []).append(i)
+
+    parent = list(range(len(texts)))
+    checked = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                union = len(sets[i] | sets[j])
+                if union and len(sets[i] & sets[j]) / union >= threshold:
+                    parent[_find(parent, j)] = _find(parent, i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(texts)):
+        groups.setdefault(_find(parent, i), []).append(i)
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+def deduplicate_chunks(splits_by_path: Dict[str, List[Document]], ids_by_path: Dict[str, List[str]],
+                       threshold: float) -> Tuple[Dict[str, List[Document]], Dict[str, List[str]], Dict]:
+    """
+    Keep one canonical chunk per near-duplicate group: the first one in
+    document order. The canonical chunk lists every source it stands for in
+    its metadata, and its ID is derived from that list, so it is re-indexed
+    whenever a duplicate appears in or disappears from another file.
+    """
+    flat = [(path, doc, doc_id)
+            for path in splits_by_path
+            for doc, doc_id in zip(splits_by_path[path], ids_by_path[path])]
+    groups = near_duplicate_groups([doc.page_content for _, doc, _ in flat], threshold)
+
+    dropped = set()
+    canonical = {}
+    for group in groups:
+        dropped.update(group[1:])
+        canonical[group[0]] = group
+
+    kept_splits = {path: [] for path in splits_by_path}
+    kept_ids = {path: [] for path in splits_by_path}
+    for i, (path, doc, doc_id) in enumerate(flat):
+        if i in dropped:
+            continue
+        if i in canonical:
+            sources = sorted({str(flat[j][1].metadata.get("source", "")) for j in canonical[i]})
+            doc = Document(page_content=doc.page_content, metadata={
+                **doc.metadata,
+                "sources": "; ".join(sources),
+                "duplicates": len(canonical[i]) - 1
+            })
+            doc_id = hashlib.sha256(f"{doc_id}\x1f{doc.metadata['sources']}".encode("utf-8")).hexdigest()[:32]
+        kept_splits[path].append(doc)
+        kept_ids[path].append(doc_id)
+
+    stats = {
+        "chunks_before": len(flat),
+        "chunks_after": len(flat) - len(dropped),
+        "duplicate_groups": len(groups),
+        "shrink_pct": round(100 * len(dropped) / len(flat), 1) if flat else 0.0
+    }
+    return kept_splits, kept_ids, stats
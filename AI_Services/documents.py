@@ -2,54 +2,148 @@
 documents.py
 Document loading and processing utilities
 """
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
 import os
-from typing import List, Any
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    CSVLoader,
-    UnstructuredMarkdownLoader
-)
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from config import config
 
 
+logger = logging.getLogger(__name__)
+
+
+# Loader class names in langchain_community.document_loaders, imported
+# only when a file of that type is actually parsed
+LOADERS = {
+    '.pdf': ("PyPDFLoader", "PDF"),
+    '.txt': ("TextLoader", "text"),
+    '.csv': ("CSVLoader", "CSV"),
+    '.md': ("UnstructuredMarkdownLoader", "markdown"),
+}
+
+
+def _loader_class(extension: str):
+    module = importlib.import_module("langchain_community.document_loaders")
+    return getattr(module, LOADERS[extension][0])
+
+
+def _cache_path(file_path: str) -> str:
+    """Page-cache entry for a file (one per path, replaced when the file changes)"""
+    key = hashlib.sha256(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+    return os.path.join(config.PAGE_CACHE_PATH, key + ".json")
+
+
+def _file_signature(file_path: str) -> List[int]:
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _read_cache(file_path: str) -> Optional[List[Document]]:
+    """Cached pages if the file's size and mtime still match, else None"""
+    try:
+        with open(_cache_path(file_path), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("signature") != _file_signature(file_path):
+        return None
+    return [Document(page_content=p["page_content"], metadata=p["metadata"]) for p in entry["pages"]]
+
+
+def _write_cache(file_path: str, docs: List[Document]):
+    os.makedirs(config.PAGE_CACHE_PATH, exist_ok=True)
+    path = _cache_path(file_path)
+    tmp_path = path + ".tmp"
+    entry = {
+        "path": file_path,
+        "signature": _file_signature(file_path),
+        "pages": [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]
+    }
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def _parse_file(file_path: str) -> Tuple[str, List[Document], float, Optional[str]]:
+    """Parse one file (runs in a worker process); errors are returned, not raised"""
+    start = time.perf_counter()
+    try:
+        loader_class = _loader_class(os.path.splitext(file_path)[1])
+        docs = loader_class(file_path).load()
+        return file_path, docs, time.perf_counter() - start, None
+    except Exception as e:
+        return file_path, [], time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
 def load_documents(file_paths: List[str]) -> List[Any]:
     """
     Load documents from various file types.
     Returns a list of Document objects.
+    Unchanged files are served from the parsed-page cache; the rest are
+    parsed in parallel, and a failure in one file never affects the others.
     """
-    documents = []
+    loaded = {}
+    to_parse = []
     
     for file_path in file_paths:
         if not os.path.exists(file_path):
-            print(f"⚠️ Warning: File not found - {file_path}")
+            logger.warning("File not found: %s", file_path)
+            continue
+        if os.path.splitext(file_path)[1] not in LOADERS:
+            logger.warning("Unsupported format: %s", file_path)
+            continue
+        
+        start = time.perf_counter()
+        cached = _read_cache(file_path) if config.PAGE_CACHE_ENABLED else None
+        if cached is not None:
+            loaded[file_path] = cached
+            logger.info("%s: %d pages/sections from cache (%.0f ms)",
+                        file_path, len(cached), (time.perf_counter() - start) * 1000)
+        else:
+            to_parse.append(file_path)
+    
+    workers = min(config.LOAD_WORKERS, len(to_parse))
+    if workers > 1:
+        # spawn: forking a process that already runs threads (uvicorn, the
+        # index reloader, ONNX Runtime) can deadlock the children
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {path: pool.submit(_parse_file, path) for path in to_parse}
+            results = []
+            for path, future in futures.items():
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # e.g. a worker killed while parsing a malformed file
+                    results.append((path, [], 0.0, f"{type(e).__name__}: {e}"))
+    else:
+        results = [_parse_file(path) for path in to_parse]
+    
+    for file_path, docs, seconds, error in results:
+        _, kind = LOADERS[os.path.splitext(file_path)[1]]
+        if error:
+            logger.error("Error loading %s after %.2fs: %s", file_path, seconds, error)
             continue
-            
-        try:
-            if file_path.endswith('.pdf'):
-                loader = PyPDFLoader(file_path)
-                print(f"📄 Loading PDF: {file_path}")
-            elif file_path.endswith('.txt'):
-                loader = TextLoader(file_path)
-                print(f"📝 Loading text: {file_path}")
-            elif file_path.endswith('.csv'):
-                loader = CSVLoader(file_path)
-                print(f"📊 Loading CSV: {file_path}")
-            elif file_path.endswith('.md'):
-                loader = UnstructuredMarkdownLoader(file_path)
-                print(f"📋 Loading markdown: {file_path}")
-            else:
-                print(f"❓ Unsupported format: {file_path}")
-                continue
-                
-            docs = loader.load()
-            documents.extend(docs)
-            print(f"   → Loaded {len(docs)} pages/sections")
-            
-        except Exception as e:
-            print(f"❌ Error loading {file_path}: {e}")
+        loaded[file_path] = docs
+        logger.info("Parsed %s: %s - %d pages/sections in %.2fs", kind, file_path, len(docs), seconds)
+        if config.PAGE_CACHE_ENABLED:
+            try:
+                _write_cache(file_path, docs)
+            except OSError as e:
+                logger.warning("Could not cache parsed pages for %s: %s", file_path, e)
+    
+    # Keep the caller's file order regardless of which workers finished first
+    documents = []
+    for file_path in file_paths:
+        documents.extend(loaded.get(file_path, []))
     
     return documents
 
@@ -77,14 +171,114 @@ def create_sample_documents() -> List[Document]:
     ]
 
 
-def split_documents(documents: List[Document]) -> List[Document]:
-    """Split documents into chunks"""
+# A line that is a question: "Q3. How do I apply?", "4) Who is eligible?", "Can I ...?"
+QUESTION_LINE = re.compile(
+    r"^\s*(?:Q(?:uestion)?\s*\d*\s*[:.)-]\s*|\d{1,3}\s*[.)]\s+)?(?P<text>[A-Z][^\n]{5,250}\?)\s*$"
+)
+# A section heading: "PART II", "Section 12 - Eligibility", or a short all-caps line
+HEADING_LINE = re.compile(
+    r"^\s*(?P<text>(?:PART\s+[IVXLC]+\b[^\n]{0,80}|SECTION\s+\d+[^\n]{0,80}|Section\s+\d+[^\n]{0,80}"
+    r"|[A-Z][A-Z0-9 ,&'()/-]{4,80}))\s*$"
+)
+
+
+def _approx_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4
+
+
+def structure_units(pages: List[Document]) -> List[Dict]:
+    """
+    Split one source's pages into units at question and heading lines.
+    A unit is a question with its answer, a section, or leading text.
+    """
+    units = []
+    section = None
+    current = {"kind": "text", "title": None, "section": None, "page": pages[0].metadata.get("page"), "lines": []}
+
+    for page in pages:
+        for line in page.page_content.splitlines():
+            question = QUESTION_LINE.match(line)
+            heading = None if question else HEADING_LINE.match(line)
+            if question or heading:
+                units.append(current)
+                if heading:
+                    section = heading.group("text").strip()
+                current = {
+                    "kind": "qa" if question else "section",
+                    "title": (question or heading).group("text").strip(),
+                    "section": section,
+                    "page": page.metadata.get("page"),
+                    "lines": [],
+                }
+            current["lines"].append(line)
+    units.append(current)
+
+    # A heading with (almost) no body of its own is folded into the next unit
+    merged = []
+    for unit in units:
+        body = "\n".join(unit["lines"]).strip()
+        if not body:
+            continue
+        if merged and merged[-1]["kind"] == "section" and len(merged[-1]["text"]) < config.STRUCTURED_MIN_CHARS:
+            previous = merged.pop()
+            unit = {**unit, "page": previous["page"]}
+            body = previous["text"] + "\n" + body
+        merged.append({**unit, "text": body})
+    return merged
+
+
+def _split_structured(pages: List[Document], fallback: RecursiveCharacterTextSplitter) -> List[Document]:
+    """One chunk per Q/A or section (capped at CHUNK_MAX_TOKENS), or the recursive splitter"""
+    units = structure_units(pages)
+    if sum(1 for u in units if u["kind"] != "text") < config.STRUCTURED_MIN_BOUNDARIES:
+        return fallback.split_documents(pages)
+
+    oversize = RecursiveCharacterTextSplitter(chunk_size=config.CHUNK_MAX_TOKENS * 4, chunk_overlap=0)
+    base = {k: v for k, v in pages[0].metadata.items() if k not in ("page", "page_label")}
+    chunks = []
+    for unit in units:
+        metadata = {**base, "chunk_type": unit["kind"]}
+        if unit["page"] is not None:
+            metadata["page"] = unit["page"]
+        if unit["section"]:
+            metadata["section"] = unit["section"]
+        if unit["kind"] == "qa":
+            metadata["question"] = unit["title"]
+
+        if _approx_tokens(unit["text"]) <= config.CHUNK_MAX_TOKENS:
+            pieces = [unit["text"]]
+        else:
+            pieces = oversize.split_text(unit["text"])
+            # Continuations repeat the question/heading so each piece stands alone
+            if unit["title"]:
+                pieces = pieces[:1] + [f"{unit['title']}\n{piece}" for piece in pieces[1:]]
+        chunks.extend(Document(page_content=piece, metadata=dict(metadata)) for piece in pieces)
+    return chunks
+
+
+def split_documents(documents: List[Document], mode: str = None) -> List[Document]:
+    """
+    Split documents into chunks.
+    "recursive" uses the generic character splitter everywhere; "structured"
+    emits one chunk per FAQ question/answer or Act section and falls back
+    to the recursive splitter for sources without that structure.
+    """
+    mode = mode or config.SPLITTER_MODE
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=config.CHUNK_SIZE,
         chunk_overlap=config.CHUNK_OVERLAP
     )
     
-    splits = text_splitter.split_documents(documents)
-    print(f"✅ Created {len(splits)} document chunks")
+    if mode == "structured":
+        by_source = {}
+        for doc in documents:
+            by_source.setdefault(doc.metadata.get("source", ""), []).append(doc)
+        splits = []
+        for pages in by_source.values():
+            splits.extend(_split_structured(pages, text_splitter))
+    else:
+        splits = text_splitter.split_documents(documents)
+    print(f"✅ Created {len(splits)} document chunks ({mode} splitter)")
     
-    return splits
\ No newline at end of file
+    return splits
@@ -0,0 +1,150 @@
+"""
+faq.py
+Precomputed FAQ question/answer index that can answer without Gemini
+"""
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from documents import load_documents, structure_units
+from ingest import file_hash, settings_fingerprint
+
+
+FAQ_INDEX_FILE = "faq_index.json"
+FAQ_VECTORS_FILE = "faq_vectors.npy"
+FAQ_INDEX_VERSION = 1
+
+FAQ_RESPONSE_TEMPLATE = "{answer}\n\nThis is the official NELFUND answer from {source_name}."
+
+MIN_ANSWER_CHARS = 20
+
+
+def _normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question.lower()).strip(" ?")
+
+
+def extract_faq_pairs(documents: List[Document]) -> List[Dict]:
+    """Question -> answer pairs from FAQ pages, deduplicated across sources"""
+    by_source = {}
+    for doc in documents:
+        by_source.setdefault(doc.metadata.get("source", ""), []).append(doc)
+
+    pairs = []
+    seen = set()
+    for source, pages in by_source.items():
+        for unit in structure_units(pages):
+            if unit["kind"] != "qa":
+                continue
+            answer = " ".join(unit["text"].split(unit["title"], 1)[-1].split())
+            key = _normalize_question(unit["title"])
+            if len(answer) < MIN_ANSWER_CHARS or key in seen:
+                continue
+            seen.add(key)
+            pairs.append({
+                "question": unit["title"],
+                "answer": answer,
+                "source": source,
+                "page": unit["page"]
+            })
+    return pairs
+
+
+class FAQIndex:
+    """Normalized question embeddings; a match returns the official answer"""
+
+    def __init__(self, entries: List[Dict], matrix: np.ndarray, threshold: float):
+        self.entries = entries
+        self.threshold = threshold
+        self._matrix = np.asarray(matrix, dtype=np.float32)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, persist_directory: str, threshold: float) -> Optional["FAQIndex"]:
+        """Open the index written at ingest, or None if there is none"""
+        try:
+            with open(os.path.join(persist_directory, FAQ_INDEX_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(os.path.join(persist_directory, FAQ_VECTORS_FILE))
+        except (OSError, ValueError):
+            return None
+        if not meta.get("entries"):
+            return None
+        return cls(meta["entries"], matrix, threshold)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(self, query_vector: List[float]) -> Optional[Dict]:
+        """Best FAQ entry (with its score) at or above the threshold, else None"""
+        scores = self._matrix @ np.asarray(query_vector, dtype=np.float32)
+        best = int(np.argmax(scores))
+        found = scores[best] >= self.threshold
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return {**self.entries[best], "score": float(scores[best])} if found else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "threshold": self.threshold
+            }
+
+
+def render_answer(entry: Dict) -> Tuple[str, List[Dict]]:
+    """Templated reply and its citation for a matched FAQ entry"""
+    source_name = os.path.splitext(os.path.basename(entry["source"]))[0]
+    reply = FAQ_RESPONSE_TEMPLATE.format(answer=entry["answer"], source_name=source_name)
+    sources = [{
+        "source": entry["source"],
+        "page": entry["page"] if entry["page"] is not None else "N/A",
+        "content_preview": f"{entry['question']} {entry['answer']}"[:200] + "..."
+    }]
+    return reply, sources
+
+
+def sync_faq_index(embeddings, file_paths: List[str], persist_directory: str) -> int:
+    """
+    Extract and embed FAQ pairs when the FAQ files or embedding settings
+    changed since the last build. Returns the number of entries.
+    """
+    index_path = os.path.join(persist_directory, FAQ_INDEX_FILE)
+    present = [p for p in file_paths if os.path.exists(p)]
+    files = {p: file_hash(p) for p in present}
+    settings = settings_fingerprint()
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta.get("version") == FAQ_INDEX_VERSION and meta.get("settings") == settings
+                and meta.get("files") == files):
+            print(f"✅ FAQ index up to date ({len(meta['entries'])} questions)")
+            return len(meta["entries"])
+    except (OSError, ValueError):
+        pass
+
+    pairs = extract_faq_pairs(load_documents(present)) if present else []
+    vectors = embeddings.embed_documents([p["question"] for p in pairs]) if pairs else []
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(pairs), -1)
+
+    os.makedirs(persist_directory, exist_ok=True)
+    vectors_path = os.path.join(persist_directory, FAQ_VECTORS_FILE)
+    with open(vectors_path + ".tmp", "wb") as f:
+        np.save(f, matrix)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": FAQ_INDEX_VERSION, "settings": settings, "files": files, "entries": pairs}, f)
+    os.replace(vectors_path + ".tmp", vectors_path)
+    os.replace(index_path + ".tmp", index_path)
+
+    print(f"✅ FAQ index built: {len(pairs)} questions from {len(present)} files")
+    return len(pairs)
@@ -0,0 +1,98 @@
+"""
+history.py
+Token-budgeted conversation history for each model call
+"""
+import json
+import threading
+from typing import Dict, List
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
+from config import config
+
+
+# Running totals across all calls, reported in /status
+_stats = {"calls": 0, "tokens_in": 0, "tokens_sent": 0, "turns_dropped": 0, "tool_outputs_compacted": 0}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """Cheap token estimate (~4 characters per token) including tool-call arguments"""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    chars = len(content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        chars += len(json.dumps([call.get("args", {}) for call in message.tool_calls], default=str))
+    return chars // 4 + 4
+
+
+def _split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a user message"""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _compact_tool_output(message: ToolMessage, max_chars: int) -> ToolMessage:
+    """Shorten a past retrieval result; the answer built from it is still in history"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if len(content) <= max_chars:
+        return message
+    stub = content[:max_chars].rstrip() + f"\n[... {len(content) - max_chars} characters of earlier retrieval omitted]"
+    return message.model_copy(update={"content": stub})
+
+
+def trim_history(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Select the history sent to the model:
+    - keep only the last HISTORY_MAX_TURNS turns,
+    - compact retrieval results from turns before the current one,
+    - drop the oldest turns until HISTORY_TOKEN_BUDGET is met.
+    The current turn is always sent in full. Turns are kept whole so
+    tool calls stay paired with their results.
+    """
+    turns = _split_turns(messages)
+    if not turns:
+        return messages
+
+    tokens_in = sum(estimate_tokens(m) for m in messages)
+    dropped = max(0, len(turns) - config.HISTORY_MAX_TURNS)
+    turns = turns[dropped:]
+
+    compacted = 0
+    for turn in turns[:-1]:
+        for i, message in enumerate(turn):
+            if isinstance(message, ToolMessage):
+                shortened = _compact_tool_output(message, config.HISTORY_TOOL_OUTPUT_CHARS)
+                if shortened is not message:
+                    turn[i] = shortened
+                    compacted += 1
+
+    turn_tokens = [sum(estimate_tokens(m) for m in turn) for turn in turns]
+    total = sum(turn_tokens)
+    while len(turns) > 1 and total > config.HISTORY_TOKEN_BUDGET:
+        total -= turn_tokens.pop(0)
+        turns.pop(0)
+        dropped += 1
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["tokens_in"] += tokens_in
+        _stats["tokens_sent"] += total
+        _stats["turns_dropped"] += dropped
+        _stats["tool_outputs_compacted"] += compacted
+
+    return [message for turn in turns for message in turn]
+
+
+def history_stats() -> Dict:
+    """Estimated tokens saved by history trimming"""
+    with _stats_lock:
+        saved = _stats["tokens_in"] - _stats["tokens_sent"]
+        return {
+            **_stats,
+            "tokens_saved": saved,
+            "avg_tokens_sent": round(_stats["tokens_sent"] / _stats["calls"]) if _stats["calls"] else 0,
+            "token_budget": config.HISTORY_TOKEN_BUDGET,
+            "max_turns": config.HISTORY_MAX_TURNS
+        }
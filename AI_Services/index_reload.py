@@ -0,0 +1,202 @@
+"""
+index_reload.py
+Blue/green index rebuilds: build a new generation in the background,
+validate it, swap it in, and garbage-collect old generations
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from config import config
+from retriever import NelfundRetriever, get_retriever, set_retriever
+from vectorstore import (create_vector_store, active_index_path, index_write_lock,
+                         ACTIVE_POINTER_FILE, PREVIOUS_POINTER_FILE)
+
+
+GENERATION_PREFIX = "gen-"
+
+
+def new_generation_path() -> str:
+    """Fresh, sortable directory name for the next index generation"""
+    name = f"{GENERATION_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    return os.path.join(config.INDEX_GENERATIONS_PATH, name)
+
+
+def _write_pointer(name: str, value: str):
+    pointer = os.path.join(config.INDEX_GENERATIONS_PATH, name)
+    tmp_path = pointer + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(value)
+    os.replace(tmp_path, pointer)
+
+
+def _read_pointer(name: str) -> Optional[str]:
+    try:
+        with open(os.path.join(config.INDEX_GENERATIONS_PATH, name), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def activate_generation(path: str):
+    """Atomically point ACTIVE at a generation directory, remembering the one it replaces"""
+    current = _read_pointer(ACTIVE_POINTER_FILE)
+    if current and current != os.path.basename(path):
+        _write_pointer(PREVIOUS_POINTER_FILE, current)
+    _write_pointer(ACTIVE_POINTER_FILE, os.path.basename(path))
+
+
+def collect_garbage(keep: int, grace_seconds: float = None) -> int:
+    """
+    Delete all but the newest `keep` generations. The active and previous
+    generations are never deleted (requests and other workers may still be
+    reading the previous one), nor is anything modified within the grace period.
+    """
+    if not os.path.isdir(config.INDEX_GENERATIONS_PATH):
+        return 0
+    grace_seconds = config.INDEX_GENERATIONS_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    protected = {_read_pointer(ACTIVE_POINTER_FILE), _read_pointer(PREVIOUS_POINTER_FILE)}
+    generations = sorted(
+        name for name in os.listdir(config.INDEX_GENERATIONS_PATH)
+        if name.startswith(GENERATION_PREFIX)
+    )
+    removed = 0
+    now = time.time()
+    for name in generations[:-keep] if keep > 0 else generations:
+        path = os.path.join(config.INDEX_GENERATIONS_PATH, name)
+        if name in protected:
+            continue
+        try:
+            if now - os.path.getmtime(path) < grace_seconds:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+class IndexReloader:
+    """
+    Runs one rebuild at a time on a background thread. Requests already
+    holding the old retriever finish on it; new requests pick up the new
+    one as soon as it is swapped in.
+    """
+
+    def __init__(self, on_swap: Callable[[str], None] = None):
+        self.on_swap = on_swap
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-reload")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._running: Optional[str] = None
+
+    def start(self) -> Dict:
+        """Queue a rebuild, or return the one already in progress"""
+        with self._lock:
+            if self._running is not None:
+                return dict(self._jobs[self._running])
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "stage": "queued",
+                "created_at": time.time(),
+                "finished_at": None,
+                "generation": None,
+                "chunks": None,
+                "stage_seconds": {},
+                "error": None
+            }
+            while len(self._jobs) > config.RELOAD_JOBS_KEEP:
+                self._jobs.popitem(last=False)
+            self._running = job_id
+        self._executor.submit(self._run, job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _stage(self, job_id: str, stage: str, started: float) -> float:
+        """Record the time spent in the previous stage and enter the next"""
+        now = time.perf_counter()
+        with self._lock:
+            job = self._jobs[job_id]
+            if job["stage"] not in ("queued", stage):
+                job["stage_seconds"][job["stage"]] = round(now - started, 3)
+            job["stage"] = stage
+            job["status"] = "running"
+        return now
+
+    def _run(self, job_id: str):
+        path = new_generation_path()
+        swapped = False
+        try:
+            live = get_retriever()
+            embeddings = live.embeddings if live else None
+
+            started = self._stage(job_id, "copying", time.perf_counter())
+            with index_write_lock():
+                source = active_index_path()
+                if os.path.isdir(source):
+                    # Start from the live index so only changed documents are
+                    # embedded; the lock keeps other writers out mid-copy
+                    shutil.copytree(source, path, ignore=shutil.ignore_patterns("*.tmp"))
+                else:
+                    os.makedirs(path)
+
+            started = self._stage(job_id, "building", started)
+            vectorstore = create_vector_store(embeddings=embeddings, persist_directory=path)
+            chunks = len(vectorstore.get(include=[])["ids"])
+            self._update(job_id, generation=os.path.basename(path), chunks=chunks)
+
+            started = self._stage(job_id, "validating", started)
+            self._validate(vectorstore, chunks, live)
+            new_retriever = NelfundRetriever(vectorstore)
+            if not new_retriever.search(config.RELOAD_SMOKE_QUERY):
+                raise RuntimeError("smoke query returned no results")
+
+            started = self._stage(job_id, "swapping", started)
+            activate_generation(path)
+            set_retriever(new_retriever)
+            swapped = True
+            if self.on_swap is not None:
+                self.on_swap(path)
+
+            started = self._stage(job_id, "collecting", started)
+            removed = collect_garbage(config.INDEX_GENERATIONS_KEEP)
+            self._stage(job_id, "done", started)
+            self._update(job_id, status="succeeded", finished_at=time.time(),
+                         generations_removed=removed)
+            print(f"✅ Index generation {os.path.basename(path)} is live ({chunks} chunks)")
+
+        except Exception as e:
+            print(f"❌ Index reload failed: {e}")
+            if not swapped:
+                shutil.rmtree(path, ignore_errors=True)
+            self._update(job_id, status="failed", finished_at=time.time(), error=str(e))
+        finally:
+            with self._lock:
+                self._running = None
+
+    @staticmethod
+    def _validate(vectorstore, chunks: int, live: Optional[NelfundRetriever]):
+        """Refuse empty indexes and sudden large shrinkage"""
+        if chunks == 0:
+            raise RuntimeError("new index is empty")
+        if live is not None:
+            live_chunks = len(live.vectorstore.get(include=[])["ids"])
+            if live_chunks and chunks < live_chunks * config.RELOAD_MIN_CHUNK_RATIO:
+                raise RuntimeError(
+                    f"new index has {chunks} chunks vs {live_chunks} live "
+                    f"(below RELOAD_MIN_CHUNK_RATIO={config.RELOAD_MIN_CHUNK_RATIO})"
+                )
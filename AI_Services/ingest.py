@@ -0,0 +1,289 @@
+"""
+ingest.py
+Incremental, manifest-driven document ingestion
+"""
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Dict, List
+from langchain_core.documents import Document
+from config import config
+from documents import load_documents, create_sample_documents, split_documents
+from dedup import deduplicate_chunks
+
+
+MANIFEST_FILE = "ingest_manifest.json"
+MANIFEST_VERSION = 1
+
+# Pseudo-path used for the built-in sample data when no documents are available
+SAMPLE_SOURCE = "__sample__"
+SAMPLE_HASH = "sample-v1"
+
+
+def file_hash(file_path: str) -> str:
+    """Return the SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def settings_fingerprint() -> Dict:
+    """Settings that change chunk contents or vectors; any change forces a full rebuild"""
+    from vectorstore import onnx_model_file  # vectorstore imports this module
+    
+    return {
+        "embedding_model": config.SENTENCE_TRANSFORMER_MODEL,
+        "embedding_backend": config.EMBEDDING_BACKEND,
+        "embedding_onnx_file": onnx_model_file() if config.EMBEDDING_BACKEND == "onnx" else None,
+        "chunk_size": config.CHUNK_SIZE,
+        "chunk_overlap": config.CHUNK_OVERLAP,
+        "splitter_mode": config.SPLITTER_MODE,
+        "chunk_max_tokens": config.CHUNK_MAX_TOKENS,
+        "dedup_threshold": config.DEDUP_THRESHOLD if config.DEDUP_ENABLED else None,
+        "vector_backend": config.VECTOR_BACKEND,
+    }
+
+
+def chunk_ids(splits: List[Document]) -> List[str]:
+    """
+    Deterministic chunk IDs derived from source, page and content.
+    Identical chunks within the same source get an occurrence suffix.
+    """
+    seen = defaultdict(int)
+    ids = []
+    for doc in splits:
+        key = "\x1f".join([
+            str(doc.metadata.get("source", "")),
+            str(doc.metadata.get("page", "")),
+            doc.page_content,
+        ])
+        occurrence = seen[key]
+        seen[key] += 1
+        ids.append(hashlib.sha256(f"{key}\x1f{occurrence}".encode("utf-8")).hexdigest()[:32])
+    return ids
+
+
+def load_manifest(persist_directory: str) -> Dict:
+    """Load the ingest manifest, or an empty one if missing/unreadable"""
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(persist_directory: str, manifest: Dict):
+    """Atomically write the ingest manifest"""
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _load_splits(file_paths: List[str]) -> Dict[str, List[Document]]:
+    """Load and split the given files, grouped by their path"""
+    splits_by_path = {}
+
+    if SAMPLE_SOURCE in file_paths:
+        splits_by_path[SAMPLE_SOURCE] = split_documents(create_sample_documents())
+
+    real_paths = [p for p in file_paths if p != SAMPLE_SOURCE]
+    if real_paths:
+        grouped = defaultdict(list)
+        for doc in load_documents(real_paths):
+            grouped[doc.metadata.get("source", "")].append(doc)
+        for path in real_paths:
+            if grouped.get(path):
+                splits_by_path[path] = split_documents(grouped[path])
+
+    return splits_by_path
+
+
+class BatchEmbedder:
+    """
+    Embeds chunks batch by batch, either in-process or across a
+    sentence-transformers multi-process pool started once per ingest.
+    """
+
+    def __init__(self, embeddings, processes: int):
+        self.embeddings = embeddings
+        self.pool = None
+        # HuggingFaceEmbeddings keeps its SentenceTransformer in `.client`
+        self._model = getattr(embeddings, "client", None)
+        if processes > 1:
+            if not hasattr(self._model, "start_multi_process_pool"):
+                raise RuntimeError(
+                    f"EMBED_PROCESSES={processes} needs sentence-transformers embeddings, "
+                    f"got {type(embeddings).__name__}"
+                )
+            print(f"⚙️ Starting {processes} embedding worker processes")
+            self.pool = self._model.start_multi_process_pool(["cpu"] * processes)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if self.pool is None:
+            return self.embeddings.embed_documents(texts)
+        vectors = self._model.encode_multi_process(
+            texts,
+            self.pool,
+            batch_size=config.EMBED_BATCH_SIZE,
+            normalize_embeddings=True
+        )
+        return vectors.tolist()
+
+    def close(self):
+        if self.pool is not None:
+            self._model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+
+def embed_and_add(vectorstore, docs: List[Document], ids: List[str]) -> float:
+    """
+    Embed and store chunks in INGEST_BATCH_SIZE batches so only one batch
+    of vectors is held in memory at a time. Returns chunks per second.
+    VectorIndex takes vectors from BatchEmbedder (optionally multi-process);
+    Chroma embeds each batch itself through the public add_documents.
+    """
+    batch_size = config.INGEST_BATCH_SIZE
+    native = hasattr(vectorstore, "add_embeddings")
+    processes = config.EMBED_PROCESSES if native and len(docs) > batch_size else 1
+    embedder = BatchEmbedder(vectorstore.embeddings, processes) if native else None
+    start = time.perf_counter()
+    try:
+        for offset in range(0, len(docs), batch_size):
+            batch_docs = docs[offset:offset + batch_size]
+            batch_ids = ids[offset:offset + batch_size]
+            if embedder is not None:
+                vectors = embedder.embed([doc.page_content for doc in batch_docs])
+                vectorstore.add_embeddings(batch_ids, vectors, batch_docs)
+            else:
+                # Upserts: a chunk ID that is already stored is overwritten
+                vectorstore.add_documents(batch_docs, ids=batch_ids)
+            done = offset + len(batch_docs)
+            print(f"   {done}/{len(docs)} chunks embedded "
+                  f"({done / (time.perf_counter() - start):.1f} chunks/s)")
+    finally:
+        if embedder is not None:
+            embedder.close()
+    elapsed = time.perf_counter() - start
+    return len(docs) / elapsed if elapsed > 0 else 0.0
+
+
+def sync_vector_store(vectorstore, file_paths: List[str], persist_directory: str) -> Dict:
+    """
+    Bring the persisted collection in line with the documents on disk.
+    Only chunks of new or changed files are embedded, chunks of removed
+    files are deleted, and nothing happens when the corpus is unchanged.
+    With near-duplicate elimination on, any change re-plans the whole
+    corpus (parsed pages come from the page cache), since a duplicate can
+    span a changed and an unchanged file; still only new chunk IDs are embedded.
+    """
+    stats = {"added": 0, "deleted": 0, "unchanged_files": 0, "changed_files": 0, "removed_files": 0,
+             "chunks_per_second": 0.0, "dedup": None}
+
+    manifest = load_manifest(persist_directory)
+    settings = settings_fingerprint()
+
+    stored_ids = set(vectorstore.get(include=[])["ids"])
+    tracked_ids = {i for entry in manifest.get("files", {}).values() for i in entry.get("chunk_ids", [])}
+    if (manifest.get("version") == MANIFEST_VERSION and manifest.get("settings") == settings
+            and tracked_ids <= stored_ids):
+        previous = manifest.get("files", {})
+    else:
+        # No usable manifest: anything already stored is untracked, built with
+        # other settings, or missing chunks the manifest lists (an interrupted
+        # or discarded index write), so start from an empty collection
+        previous = {}
+        if stored_ids:
+            print("♻️ Existing vector store has no matching manifest - rebuilding from scratch")
+            vectorstore.reset_collection()
+
+    current = {}
+    for path in file_paths:
+        if os.path.exists(path):
+            current[path] = file_hash(path)
+        else:
+            print(f"⚠️ Warning: File not found - {path}")
+
+    if not current:
+        print("⚠️ No documents found. Using sample data...")
+        current = {SAMPLE_SOURCE: SAMPLE_HASH}
+
+    changed = [p for p in current if previous.get(p, {}).get("hash") != current[p]]
+    removed = [p for p in previous if p not in current]
+    stats["unchanged_files"] = len(current) - len(changed)
+
+    if not changed and not removed:
+        print(f"✅ Vector store up to date ({stats['unchanged_files']} files unchanged) - nothing to embed")
+        return stats
+
+    files = {p: entry for p, entry in previous.items() if p not in removed}
+    stale_ids = set()
+    for path in removed:
+        stale_ids.update(previous[path].get("chunk_ids", []))
+
+    to_add_docs, to_add_ids = [], []
+    split_paths = list(current) if config.DEDUP_ENABLED else changed
+    splits_by_path = _load_splits(split_paths)
+    ids_by_path = {path: chunk_ids(splits) for path, splits in splits_by_path.items()}
+
+    if config.DEDUP_ENABLED:
+        splits_by_path, ids_by_path, stats["dedup"] = deduplicate_chunks(
+            splits_by_path, ids_by_path, config.DEDUP_THRESHOLD
+        )
+        dedup = stats["dedup"]
+        print(f"🧹 Near-duplicates: {dedup['chunks_before']} → {dedup['chunks_after']} chunks "
+              f"({dedup['duplicate_groups']} groups, index {dedup['shrink_pct']}% smaller)")
+
+    for path in split_paths:
+        if path not in splits_by_path:
+            # Failed to load: keep whatever was indexed before and retry next time
+            print(f"⚠️ Keeping previous chunks for {path} (could not be loaded)")
+            continue
+
+        old_ids = set(previous.get(path, {}).get("chunk_ids", []))
+        splits = splits_by_path[path]
+        ids = ids_by_path[path]
+
+        for doc, doc_id in zip(splits, ids):
+            if doc_id not in old_ids:
+                to_add_docs.append(doc)
+                to_add_ids.append(doc_id)
+
+        stale_ids.update(old_ids - set(ids))
+        files[path] = {"hash": current[path], "chunk_ids": ids}
+        if path in changed:
+            stats["changed_files"] += 1
+
+    if stale_ids:
+        print(f"🗑️ Deleting {len(stale_ids)} stale chunks")
+        vectorstore.delete(ids=sorted(stale_ids))
+
+    if to_add_docs:
+        print(f"💾 Embedding {len(to_add_docs)} new chunks...")
+        stats["chunks_per_second"] = round(embed_and_add(vectorstore, to_add_docs, to_add_ids), 1)
+
+    # Backends that buffer writes in memory (the NumPy index) persist once here
+    persist = getattr(vectorstore, "persist", None)
+    if persist is not None:
+        persist()
+
+    save_manifest(persist_directory, {
+        "version": MANIFEST_VERSION,
+        "settings": settings,
+        "files": files,
+    })
+
+    stats["added"] = len(to_add_ids)
+    stats["deleted"] = len(stale_ids)
+    stats["removed_files"] = len(removed)
+    print(f"✅ Ingest complete: +{stats['added']} / -{stats['deleted']} chunks "
+          f"({stats['changed_files']} changed, {stats['removed_files']} removed, "
+          f"{stats['unchanged_files']} unchanged files, {stats['chunks_per_second']} chunks/s)")
+    return stats
@@ -2,8 +2,6 @@
 llm.py
 LLM initialization and configuration
 """
-import google.generativeai as genai
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage
 from config import config
 
@@ -68,7 +66,13 @@ Remember: Greetings and small talk = NO RETRIEVAL. Policy questions = ALWAYS RET
 def initialize_llm():
     """Initialize Gemini LLM"""
     try:
-        genai.configure(api_key=config.GOOGLE_API_KEY)
+        # Imported here: the Gemini client libraries are only needed once the
+        # LLM is actually created, not whenever this module is imported
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        
+        if config.GOOGLE_API_KEY:
+            import google.generativeai as genai
+            genai.configure(api_key=config.GOOGLE_API_KEY)
         
         llm = ChatGoogleGenerativeAI(
             model=config.GEMINI_MODEL,
@@ -6,55 +6,71 @@ Main entry point
 Author: AI Engineer
 Date: 2024
 """
-import uvicorn
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from config import config
-from vectorstore import create_vector_store
-from retriever import NelfundRetriever, set_retriever
-from llm import initialize_llm
-from agent import create_agent
-from api import create_app
+from startup import StartupTracker
 
 
-# Global app instance for uvicorn
-app = None
+# Per-file document loading times are logged rather than printed
+logging.basicConfig(level=logging.INFO, format="%(message)s")
 
+# Readiness of each heavy component, reported by GET /ready
+startup = StartupTracker(["embeddings", "index", "llm", "agent"])
 
-def initialize():
-    """Initialize all components and return the FastAPI app"""
-    global app
-    
+
+def initialize(app) -> bool:
+    """Load all components and attach them to the (already serving) app"""
     print("=" * 60)
     print("📚 NELFUND STUDENT LOAN NAVIGATOR")
     print("=" * 60)
     print("✅ Starting initialization...")
     
+    if not config.GOOGLE_API_KEY:
+        # Nothing to retry: fail fast instead of loading the models first
+        print("\n❌ FATAL: GOOGLE_API_KEY is not set in your .env file")
+        print("   ⚠️  Get your API key from: https://makersuite.google.com/app/apikey")
+        startup.fail("llm", "GOOGLE_API_KEY is not set")
+        return False
+    
     try:
-        # 1. Create vector store
-        print("\n[1/4] Creating vector store...")
-        vectorstore = create_vector_store()
+        # Imported here so importing main.py (uvicorn workers, tests) stays cheap
+        from vectorstore import create_embeddings, create_vector_store, load_vector_store, active_index_path
+        from retriever import NelfundRetriever, set_retriever
+        from llm import initialize_llm
+        from agent import create_agent
+        
+        # 1. Load the embedding model
+        print("\n[1/4] Loading embeddings...")
+        with startup.stage("embeddings"):
+            embeddings = create_embeddings()
         
-        # 2. Initialize retriever
-        print("\n[2/4] Initializing retriever...")
-        nelfund_retriever = NelfundRetriever(vectorstore)
-        set_retriever(nelfund_retriever)
+        # 2. Create vector store (or open a prebuilt artifact as-is) and the retriever
+        print("\n[2/4] Loading vector store...")
+        with startup.stage("index"):
+            if config.INDEX_LOAD_ONLY:
+                vectorstore = load_vector_store(embeddings=embeddings)
+            else:
+                vectorstore = create_vector_store(embeddings=embeddings)
+            nelfund_retriever = NelfundRetriever(vectorstore)
+            set_retriever(nelfund_retriever)
         print("✅ Retriever initialized")
         
         # 3. Initialize LLM
         print("\n[3/4] Initializing LLM...")
-        llm = initialize_llm()
+        with startup.stage("llm"):
+            llm = initialize_llm()
+            if llm is None:
+                raise RuntimeError("LLM initialization failed - ensure GOOGLE_API_KEY is set in your .env file")
         
-        if llm is None:
-            print("\n❌ FATAL: LLM initialization failed")
-            print("Please ensure GOOGLE_API_KEY is set in your .env file")
-            return None
-        
-        # 4. Create agent
+        # 4. Create agent and start serving chats
         print("\n[4/4] Creating agent...")
-        agent = create_agent(llm)
-        
-        if agent is None:
-            print("\n❌ FATAL: Agent creation failed")
-            return None
+        with startup.stage("agent"):
+            agent = create_agent(llm)
+            if agent is None:
+                raise RuntimeError("Agent creation failed")
+            app.state.attach_components(agent, nelfund_retriever, llm)
         
         print("\n🎉 NELFUND Assistant is ready to help students!")
         
@@ -62,54 +78,86 @@ def initialize():
         print("\n📊 Configuration Summary:")
         print(f"   - Chat Model: Google Gemini {config.GEMINI_MODEL}")
         print(f"   - Embeddings: Sentence Transformer ({config.SENTENCE_TRANSFORMER_MODEL})")
-        print(f"   - Vector Store: {config.VECTOR_STORE_PATH}")
+        print(f"   - Vector Store: {active_index_path()}")
         print(f"   - Document Sources: {len(config.DOCUMENT_PATHS)} files")
         
-        # Create FastAPI app
-        print("\n🖥️  Creating FastAPI application...")
-        app = create_app(agent, nelfund_retriever, llm)
-        
         # Print endpoints
         print("\n📚 Available endpoints:")
         print("  • GET  /              - Health check")
+        print("  • GET  /ready         - Readiness probe (startup stages)")
         print("  • POST /chat          - Chat with NELFUND assistant")
+        print("  • POST /chat/stream   - Chat with streamed (SSE) responses")
         print("  • GET  /sessions/{id} - Get conversation history")
         print("  • POST /reset/{id}    - Reset session")
         print("  • GET  /status        - System status")
-        print("  • POST /reload-embeddings - Update document embeddings")
+        print("  • POST /reload-embeddings - Rebuild the index in the background")
+        print("  • GET  /reload-embeddings/{job_id} - Rebuild progress")
         print("  • POST /debug-gemini  - Debug Gemini response format")
         
         print("\n🔑 Environment Setup:")
         print(f"   ✅ GOOGLE_API_KEY: {'Set' if config.GOOGLE_API_KEY else 'NOT SET'}")
-        if not config.GOOGLE_API_KEY:
-            print("   ⚠️  Get your API key from: https://makersuite.google.com/app/apikey")
         
         print("\n💡 Cost Optimization:")
         print("   ✅ Embeddings use local Sentence Transformers - NO API COST!")
         print("   💰 Only chat requests use Gemini API")
         
+        print("\n⏱️  Startup stages:")
+        for name, component in startup.snapshot()["components"].items():
+            print(f"   - {name}: {component['seconds']}s")
+        
         print("\n" + "=" * 60)
         
-        return app
+        return True
         
     except Exception as e:
-        print(f"\n❌ Initialization failed: {e}")
+        print(f"\n❌ FATAL: Initialization failed: {e}")
         import traceback
         traceback.print_exc()
-        return None
+        if not startup.failed:
+            # Failed outside a stage (e.g. an import): blame the next unfinished component
+            unfinished = [name for name, component in startup.snapshot()["components"].items()
+                          if component["state"] != "ready"]
+            startup.fail(unfinished[0] if unfinished else "agent", str(e))
+        return False
 
 
-# Initialize the app at module level
-app = initialize()
+@asynccontextmanager
+async def lifespan(app):
+    """Bind immediately and load the heavy components in the background"""
+    loop = asyncio.get_running_loop()
+    app.state.initialization = loop.run_in_executor(None, initialize, app)
+    yield
+
+
+_app = None
+
+
+def get_app():
+    """
+    The ASGI app, created on first use rather than at import: spawned
+    worker processes (document parsing) re-import this module and must
+    not build an app of their own
+    """
+    global _app
+    if _app is None:
+        from api import create_app
+        # Creating the app is cheap; components load when the server starts
+        _app = create_app(lifespan=lifespan, startup=startup)
+    return _app
+
+
+def __getattr__(name: str):
+    # `uvicorn main:app` looks the app up here
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    if app is None:
-        print("\n❌ Application failed to initialize. Exiting.")
-        exit(1)
+    import uvicorn
     
     print("\n🚀 Starting server on http://localhost:8000")
     print("📖 API documentation: http://localhost:8000/docs")
+    print("🩺 Readiness: http://localhost:8000/ready")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000)
-
+    uvicorn.run(get_app(), host="0.0.0.0", port=8000)
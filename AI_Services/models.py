@@ -165,6 +165,7 @@ class ChatRequest(BaseModel):
     message: str
     phone_number: Optional[str] = Field(
         default=None, 
+        validate_default=True,  # so an omitted phone number also gets a guest ID
         description="User's phone number for session identification. Auto-generated for guest users."
     )
     
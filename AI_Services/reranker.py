@@ -0,0 +1,94 @@
+"""
+reranker.py
+Optional cross-encoder re-ranking of retrieval candidates
+"""
+import threading
+import time
+from typing import Dict, List, Tuple
+from langchain_core.documents import Document
+from config import config
+
+
+class CrossEncoderReranker:
+    """
+    Scores (query, chunk) pairs with a small local cross-encoder in one
+    batched forward pass and keeps the best few above a score threshold.
+    """
+
+    def __init__(self, model_name: str, top_n: int, min_score: float):
+        # Imported here so the model is only loaded when re-ranking is enabled
+        from sentence_transformers import CrossEncoder
+
+        print(f"🔍 Loading cross-encoder: {model_name}")
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.top_n = top_n
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.candidates_in = 0
+        self.kept_out = 0
+
+    def rerank(self, query: str, docs: List[Document]) -> List[Tuple[Document, float]]:
+        """Return up to top_n (document, score) pairs, best first"""
+        if not docs:
+            return []
+
+        start = time.perf_counter()
+        scores = self.model.predict(
+            [(query, doc.page_content) for doc in docs],
+            batch_size=len(docs),
+            show_progress_bar=False
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        ranked = sorted(zip(docs, (float(s) for s in scores)), key=lambda item: item[1], reverse=True)
+        kept = [(doc, score) for doc, score in ranked if score >= self.min_score][:self.top_n]
+        if not kept:
+            # Never leave the model with nothing; the best candidate is still the best guess
+            kept = ranked[:1]
+
+        with self._lock:
+            self.calls += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.candidates_in += len(docs)
+            self.kept_out += len(kept)
+
+        return kept
+
+    def stats(self) -> Dict:
+        """Latency and pruning statistics"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+                "max_ms": round(self.max_ms, 2),
+                "avg_candidates": round(self.candidates_in / self.calls, 2) if self.calls else 0.0,
+                "avg_kept": round(self.kept_out / self.calls, 2) if self.calls else 0.0
+            }
+
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker():
+    """Shared re-ranker (loaded once), or None when disabled"""
+    global _reranker
+    if not config.RERANK_ENABLED:
+        return None
+    with _reranker_lock:
+        if _reranker is None:
+            _reranker = CrossEncoderReranker(
+                config.RERANK_MODEL,
+                top_n=config.RERANK_TOP_N,
+                min_score=config.RERANK_MIN_SCORE
+            )
+        return _reranker
+
+
+def loaded_reranker():
+    """The shared re-ranker if it has already been built; never builds it"""
+    return _reranker
@@ -92,39 +92,183 @@
 retriever.py
 Document retrieval functionality
 """
-from typing import List, Dict
-from langchain_core.tools import tool
+import asyncio
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.tools import StructuredTool
 from config import config
+from bm25 import BM25Index
+from cache import LRUCache
+from reranker import get_reranker, loaded_reranker
+from compression import compress_results, compression_stats
+
+
+# Bounded pool for CPU-bound query embedding + vector search, so it
+# never runs on the event loop
+_executor = ThreadPoolExecutor(
+    max_workers=config.RETRIEVAL_WORKERS,
+    thread_name_prefix="retrieval"
+)
+
+
+# Two-level cache shared by all retrievers. Keys carry the index
+# generation, so a reloaded index never sees results from the old one.
+_generations = itertools.count(1)
+_embedding_cache = LRUCache(config.QUERY_EMBEDDING_CACHE_SIZE)
+_results_cache = LRUCache(config.RESULT_CACHE_SIZE)
+_sentence_cache = LRUCache(config.SENTENCE_EMBEDDING_CACHE_SIZE)
+
+
+def _normalize_query(query: str) -> str:
+    """Case/whitespace-insensitive cache key (the MiniLM tokenizer is uncased)"""
+    return " ".join(query.lower().split())
+
+
+def reciprocal_rank_fusion(ranked_lists: List[Tuple[List[Document], float]], k: int) -> List[Document]:
+    """
+    Fuse ranked document lists with weighted reciprocal-rank fusion:
+    score(d) = sum(weight / (HYBRID_RRF_K + rank)) over the lists containing d.
+    """
+    scores = {}
+    documents = {}
+    for docs, weight in ranked_lists:
+        for rank, doc in enumerate(docs, start=1):
+            key = (doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content)
+            scores[key] = scores.get(key, 0.0) + weight / (config.HYBRID_RRF_K + rank)
+            documents.setdefault(key, doc)
+    
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
 
 
 class NelfundRetriever:
     """Retriever for NELFUND documents"""
     
-    def __init__(self, vectorstore):
+    def __init__(self, vectorstore, mode: str = None):
         self.vectorstore = vectorstore
-        self.retriever = vectorstore.as_retriever(
-            search_type="mmr",
-            search_kwargs={
-                "k": config.RETRIEVAL_K,
-                "fetch_k": config.RETRIEVAL_FETCH_K,
-                "lambda_mult": 0.7
-            }
-        )
+        self.embeddings = vectorstore.embeddings
+        self.generation = next(_generations)
+        self.mode = mode or config.RETRIEVAL_MODE
+        
+        # Lexical index over the same chunks, rebuilt with each index generation
+        self.lexical_index = None
+        if self.mode == "hybrid":
+            self.lexical_index = BM25Index.from_vectorstore(vectorstore)
+            print(f"✅ BM25 index built over {len(self.lexical_index)} chunks")
     
-    def search(self, query: str) -> List[Dict]:
-        """Search for relevant documents"""
-        docs = self.retriever.invoke(query)
+    def search(self, query: str, k: int = None, fetch_k: int = None,
+               lambda_mult: float = None) -> List[Dict]:
+        """Search for relevant documents (MMR or hybrid BM25 + vector)"""
+        k = k or config.RETRIEVAL_K
+        fetch_k = fetch_k or config.RETRIEVAL_FETCH_K
+        lambda_mult = config.RETRIEVAL_LAMBDA_MULT if lambda_mult is None else lambda_mult
+        
+        # Only the parameters the mode uses: hybrid ignores fetch_k and lambda_mult
+        params = (k,) if self.mode == "hybrid" else (k, fetch_k, lambda_mult)
+        key = (self.generation, self.mode, _normalize_query(query), *params)
+        cached = _results_cache.get(key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+        
+        # With re-ranking, fetch a wider pool and let the cross-encoder choose
+        reranker = get_reranker()
+        candidate_count = max(k, config.RERANK_CANDIDATES) if reranker else k
+        
+        if self.mode == "hybrid":
+            docs = self._hybrid_search(query, candidate_count)
+        else:
+            docs = self.vectorstore.max_marginal_relevance_search_by_vector(
+                self.embed_query(query),
+                k=candidate_count,
+                fetch_k=max(fetch_k, candidate_count),
+                lambda_mult=lambda_mult
+            )
+        
+        scores = [None] * len(docs)
+        if reranker:
+            ranked = reranker.rerank(query, docs)[:k]
+            docs = [doc for doc, _ in ranked]
+            scores = [score for _, score in ranked]
         
         results = []
-        for i, doc in enumerate(docs):
-            results.append({
+        for i, (doc, score) in enumerate(zip(docs, scores)):
+            result = {
                 "id": i + 1,
                 "content": doc.page_content,
                 "source": doc.metadata.get("source", "Unknown"),
                 "page": doc.metadata.get("page", "N/A")
-            })
+            }
+            if score is not None:
+                result["rerank_score"] = round(score, 4)
+            results.append(result)
         
+        _results_cache.put(key, [dict(result) for result in results])
         return results
+    
+    def _hybrid_search(self, query: str, k: int) -> List[Document]:
+        """Fuse dense and BM25 candidates with reciprocal-rank fusion"""
+        candidates = max(k, config.HYBRID_CANDIDATES)
+        dense = self.vectorstore.similarity_search_by_vector(self.embed_query(query), k=candidates)
+        lexical = [doc for doc, _ in self.lexical_index.search(query, candidates)]
+        return reciprocal_rank_fusion([
+            (dense, config.HYBRID_DENSE_WEIGHT),
+            (lexical, config.HYBRID_LEXICAL_WEIGHT)
+        ], k)
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the index's embedding model (cached)"""
+        key = (self.generation, _normalize_query(query))
+        embedding = _embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            _embedding_cache.put(key, embedding)
+        return embedding
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a query without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self.embed_query, query)
+    
+    def embed_sentences(self, sentences: List[str]) -> np.ndarray:
+        """Embed chunk sentences, reusing vectors of sentences seen before"""
+        keys = [(self.generation, sentence) for sentence in sentences]
+        vectors = [_sentence_cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embeddings.embed_documents([sentences[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+                _sentence_cache.put(keys[i], vector)
+        return np.asarray(vectors, dtype=np.float32)
+    
+    def compress(self, query: str, results: List[Dict]) -> str:
+        """Tool output built from only the sentences most relevant to the query"""
+        content, stats = compress_results(
+            results,
+            self.embed_query(query),
+            self.embed_sentences,
+            budget_chars=config.COMPRESSION_BUDGET_CHARS,
+            min_sentence_chars=config.COMPRESSION_MIN_SENTENCE_CHARS,
+            min_overlap_chars=config.COMPRESSION_MIN_OVERLAP_CHARS
+        )
+        print(f"🗜️ Context compressed {stats['chars_in']} → {stats['chars_out']} chars "
+              f"({stats['ratio']:.0%} kept)")
+        return content
+    
+    def search_context(self, query: str) -> Tuple[str, List[Dict]]:
+        """Search, then format (or compress) the results for the model"""
+        results = self.search(query)
+        if results and config.COMPRESSION_ENABLED:
+            return self.compress(query, results), results
+        return _format_results(results), results
+    
+    async def asearch_context(self, query: str) -> Tuple[str, List[Dict]]:
+        """Search and build the tool output without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self.search_context, query)
 
 
 # Global retriever instance
@@ -135,10 +279,59 @@ def set_retriever(retriever: NelfundRetriever):
     """Set the global retriever instance"""
     global _nelfund_retriever
     _nelfund_retriever = retriever
+    
+    # Entries of the previous generation can never be hit again
+    _embedding_cache.clear()
+    _results_cache.clear()
+    _sentence_cache.clear()
+
+
+def get_retriever():
+    """Get the active retriever instance"""
+    return _nelfund_retriever
+
 
+def cache_stats() -> Dict:
+    """Hit ratios of the query-embedding and result caches"""
+    return {
+        "generation": _nelfund_retriever.generation if _nelfund_retriever else None,
+        "query_embeddings": _embedding_cache.stats(),
+        "results": _results_cache.stats(),
+        "sentence_embeddings": _sentence_cache.stats()
+    }
 
-@tool
-def retrieve_nelfund_info(query: str) -> str:
+
+def rerank_stats():
+    """Cross-encoder latency statistics, or "disabled" when re-ranking is off"""
+    if not config.RERANK_ENABLED:
+        return "disabled"
+    # Reported from the instance searches already built: loading the model
+    # from a status call would stall it for seconds
+    reranker = loaded_reranker()
+    return reranker.stats() if reranker else "not loaded"
+
+
+def context_compression_stats():
+    """Tool-output compression ratios, or "disabled" when compression is off"""
+    return compression_stats() if config.COMPRESSION_ENABLED else "disabled"
+
+
+def _format_results(results: List[Dict]) -> str:
+    """Format search results for the model"""
+    if not results:
+        return "🔍 No relevant documents found. Please try rephrasing your question."
+    
+    # Format results WITHOUT citations (sources will be in the sources array)
+    formatted_results = []
+    for result in results:
+        formatted_results.append(
+            f"📄 Document {result['id']}:\n{result['content']}\n"
+        )
+    
+    return "\n" + "─" * 50 + "\n".join(formatted_results) + "\n" + "─" * 50
+
+
+def _retrieve_nelfund_info(query: str) -> Tuple[str, List[Dict]]:
     """
     Search NELFUND policy documents for specific information.
     
@@ -157,21 +350,29 @@ def retrieve_nelfund_info(query: str) -> str:
     
     Returns formatted document excerpts without citations (citations are handled separately).
     """
-    global _nelfund_retriever
+    retriever = _nelfund_retriever
     
-    if _nelfund_retriever is None:
-        return "⚠️ Document database not initialized. Please restart the system."
+    if retriever is None:
+        return "⚠️ Document database not initialized. Please restart the system.", []
     
-    results = _nelfund_retriever.search(query)
+    return retriever.search_context(query)
+
+
+async def _aretrieve_nelfund_info(query: str) -> Tuple[str, List[Dict]]:
+    """Async variant of the retrieval tool used by the async agent"""
+    retriever = _nelfund_retriever
     
-    if not results:
-        return "🔍 No relevant documents found. Please try rephrasing your question."
+    if retriever is None:
+        return "⚠️ Document database not initialized. Please restart the system.", []
     
-    # Format results WITHOUT citations (sources will be in the sources array)
-    formatted_results = []
-    for result in results:
-        formatted_results.append(
-            f"📄 Document {result['id']}:\n{result['content']}\n"
-        )
-    
-    return "\n" + "─" * 50 + "\n".join(formatted_results) + "\n" + "─" * 50
\ No newline at end of file
+    return await retriever.asearch_context(query)
+
+
+# The search results ride along as the ToolMessage artifact, so the API
+# can cite exactly what the model saw without searching again
+retrieve_nelfund_info = StructuredTool.from_function(
+    func=_retrieve_nelfund_info,
+    coroutine=_aretrieve_nelfund_info,
+    name="retrieve_nelfund_info",
+    response_format="content_and_artifact"
+)
@@ -0,0 +1,108 @@
+"""
+router.py
+Local intent router that answers small talk without calling Gemini
+"""
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+
+
+# Labeled exemplars per small-talk intent
+INTENT_EXEMPLARS = {
+    "greeting": [
+        "hello", "hi", "hey", "hi there", "good morning", "good afternoon",
+        "good evening", "how are you", "hello nelfi", "hey, how are you doing"
+    ],
+    "farewell": [
+        "goodbye", "bye", "see you", "see you later", "thanks bye", "talk to you later",
+        "have a nice day", "bye for now"
+    ],
+    "gratitude": [
+        "thank you", "thanks", "thanks a lot", "i appreciate it", "thank you so much",
+        "that was helpful, thanks"
+    ],
+    "capabilities": [
+        "what can you do", "how do you work", "who are you", "what are you",
+        "what can you help me with", "what do you do", "what is nelfi"
+    ],
+    "acknowledgment": [
+        "okay", "ok", "alright", "i see", "got it", "cool", "understood", "nice to meet you"
+    ],
+}
+
+INTENT_RESPONSES = {
+    "greeting": (
+        "Hello! I'm NELFI, your NELFUND Student Loan Navigator. I'm here to help you "
+        "understand and access student loans for your education in Nigeria. What would "
+        "you like to know about NELFUND?"
+    ),
+    "farewell": (
+        "Goodbye, and best of luck with your studies! Come back any time you have "
+        "questions about NELFUND student loans."
+    ),
+    "gratitude": (
+        "You're welcome! Is there anything else you'd like to know about NELFUND "
+        "eligibility, applications or repayment?"
+    ),
+    "capabilities": (
+        "I can help you with: checking eligibility criteria, understanding the "
+        "application process, learning about repayment terms, finding required "
+        "documents, and answering questions about NELFUND policies. What specific "
+        "aspect interests you?"
+    ),
+    "acknowledgment": (
+        "Great! Let me know if you have any other questions about NELFUND student loans."
+    ),
+}
+
+
+class IntentRouter:
+    """
+    Nearest-exemplar classifier over the already-loaded sentence-transformer
+    embeddings. Only short messages are routed, so a greeting followed by a
+    real question still goes to the agent.
+    """
+
+    def __init__(self, embeddings, threshold: float, max_words: int):
+        self.threshold = threshold
+        self.max_words = max_words
+        self._labels: List[str] = []
+        texts = []
+        for intent, exemplars in INTENT_EXEMPLARS.items():
+            self._labels.extend([intent] * len(exemplars))
+            texts.extend(exemplars)
+        # Vectors are normalized, so a matrix-vector product gives cosine scores
+        self._matrix = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        self._lock = threading.Lock()
+        self.counts = {intent: 0 for intent in INTENT_EXEMPLARS}
+        self.fallthrough = 0
+
+    def classify(self, message: str, query_vector: List[float]) -> Optional[Dict]:
+        """Return {"intent", "confidence", "response"} for small talk, else None"""
+        intent, confidence = None, 0.0
+        if len(message.split()) <= self.max_words:
+            scores = self._matrix @ np.asarray(query_vector, dtype=np.float32)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                intent, confidence = self._labels[best], float(scores[best])
+
+        with self._lock:
+            if intent is None:
+                self.fallthrough += 1
+                return None
+            self.counts[intent] += 1
+
+        return {
+            "intent": intent,
+            "confidence": confidence,
+            "response": INTENT_RESPONSES[intent]
+        }
+
+    def stats(self) -> Dict:
+        """Per-intent counters for /status"""
+        with self._lock:
+            return {
+                "routed": dict(self.counts),
+                "fallthrough": self.fallthrough,
+                "threshold": self.threshold
+            }
@@ -0,0 +1,475 @@
+"""
+sessions.py
+Bounded conversation history storage
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from config import config
+from db import get_database
+
+
+# Anonymous session IDs: the API mints "guest_<id>", the web widget sends "guest-<ms>"
+GUEST_PREFIXES = ("guest_", "guest-")
+
+
+def is_guest(phone_number) -> bool:
+    """True for anonymous session IDs, which get the shorter guest idle TTL"""
+    return isinstance(phone_number, str) and phone_number.startswith(GUEST_PREFIXES)
+
+
+class SessionStore(ABC):
+    """Interface for conversation history storage, keyed on phone number"""
+
+    def __init__(self):
+        self._evict_listeners: List[Callable[[str], None]] = []
+        self._stop_sweeper = None
+        self._sweeper = None
+
+    @abstractmethod
+    def ensure(self, phone_number: str):
+        """Get or create a session"""
+
+    @abstractmethod
+    def get(self, phone_number: str) -> Optional[Dict]:
+        """Snapshot of a session ({created_at, messages}) or None"""
+
+    @abstractmethod
+    def message_count(self, phone_number: str) -> int:
+        """Number of stored messages for a session (0 if unknown)"""
+
+    @abstractmethod
+    def append(self, phone_number: str, role: str, content: str):
+        """Append one message to a session"""
+
+    @abstractmethod
+    def reset(self, phone_number: str):
+        """Clear a session's messages"""
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Evict idle sessions; returns how many were evicted"""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Counters for /status"""
+
+    def on_evict(self, listener: Callable[[str], None]):
+        """Register a callback invoked with the phone number of evicted sessions"""
+        self._evict_listeners.append(listener)
+
+    def _notify_evicted(self, phone_numbers: List[str]):
+        for phone_number in phone_numbers:
+            for listener in self._evict_listeners:
+                try:
+                    listener(phone_number)
+                except Exception as e:
+                    print(f"⚠️ Session eviction listener failed for {phone_number}: {e}")
+
+    def start_sweeper(self, interval_seconds: float):
+        """Run sweep() periodically on a daemon thread"""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval_seconds):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"⚠️ Session sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+        self._stop_sweeper = stop
+
+    def stop_sweeper(self):
+        if self._stop_sweeper is not None:
+            self._stop_sweeper.set()
+            self._sweeper.join()
+            self._stop_sweeper = self._sweeper = None
+
+    def start(self):
+        """Start background maintenance; called from app startup, not at construction"""
+        self.start_sweeper(config.SESSION_SWEEP_INTERVAL_SECONDS)
+
+    def close(self):
+        """Stop background maintenance; called from app shutdown"""
+        self.stop_sweeper()
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    In-process store with a max-entries bound (LRU), idle TTL eviction
+    and a per-session message cap. Counters are maintained incrementally.
+    """
+
+    def __init__(self, max_entries: int, idle_ttl_seconds: float,
+                 guest_idle_ttl_seconds: float, max_messages: int):
+        super().__init__()
+        self.max_entries = max_entries
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.guest_idle_ttl_seconds = guest_idle_ttl_seconds
+        self.max_messages = max_messages
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_messages = 0
+        self._evicted = 0
+
+    def _ttl(self, phone_number: str) -> float:
+        # Anonymous requests mint a fresh guest ID each time, so expire them sooner
+        if is_guest(phone_number):
+            return self.guest_idle_ttl_seconds
+        return self.idle_ttl_seconds
+
+    def _touch(self, phone_number: str) -> Dict:
+        session = self._sessions.get(phone_number)
+        if session is None:
+            session = {
+                "created_at": datetime.now(),
+                "messages": deque(maxlen=self.max_messages),
+            }
+            self._sessions[phone_number] = session
+        session["last_active"] = time.monotonic()
+        self._sessions.move_to_end(phone_number)
+        return session
+
+    def _remove(self, phone_number: str):
+        session = self._sessions.pop(phone_number)
+        self._total_messages -= len(session["messages"])
+        self._evicted += 1
+
+    def ensure(self, phone_number: str):
+        evicted = []
+        with self._lock:
+            self._touch(phone_number)
+            while len(self._sessions) > self.max_entries:
+                oldest = next(iter(self._sessions))
+                self._remove(oldest)
+                evicted.append(oldest)
+        self._notify_evicted(evicted)
+
+    def get(self, phone_number: str) -> Optional[Dict]:
+        with self._lock:
+            session = self._sessions.get(phone_number)
+            if session is None:
+                return None
+            return {
+                "created_at": session["created_at"],
+                "messages": list(session["messages"]),
+            }
+
+    def message_count(self, phone_number: str) -> int:
+        with self._lock:
+            session = self._sessions.get(phone_number)
+            return len(session["messages"]) if session else 0
+
+    def append(self, phone_number: str, role: str, content: str):
+        with self._lock:
+            messages = self._touch(phone_number)["messages"]
+            if len(messages) < messages.maxlen:
+                self._total_messages += 1
+            messages.append({
+                "role": role,
+                "content": content,
+                "timestamp": datetime.now()
+            })
+
+    def reset(self, phone_number: str):
+        with self._lock:
+            session = self._sessions.get(phone_number)
+            if session is not None:
+                self._total_messages -= len(session["messages"])
+                session["messages"].clear()
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for phone_number, session in self._sessions.items():
+                try:
+                    if now - session["last_active"] > self._ttl(phone_number):
+                        expired.append(phone_number)
+                except Exception as e:
+                    # One bad entry must not stop the rest of the pass
+                    print(f"⚠️ Skipping session {phone_number!r} in sweep: {e}")
+            for phone_number in expired:
+                self._remove(phone_number)
+        self._notify_evicted(expired)
+        return len(expired)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions_active": len(self._sessions),
+                "total_messages": self._total_messages,
+                "sessions_evicted": self._evicted,
+                "max_entries": self.max_entries,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Durable store shared by every worker through a local SQLite file.
+    Appends are buffered and written in batches (on size, on a timer, or
+    before reading history); counters live in the database so /status stays O(1).
+    Calls may block on the database, so async callers run them in a thread.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        phone_number TEXT PRIMARY KEY,
+        created_at TEXT NOT NULL,
+        last_active REAL NOT NULL,
+        message_count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_sessions_last_active ON sessions(last_active);
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        phone_number TEXT NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        timestamp TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_messages_phone_timestamp ON messages(phone_number, timestamp);
+    CREATE TABLE IF NOT EXISTS session_counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO session_counters (name, value) VALUES
+        ('sessions', 0), ('messages', 0), ('evicted', 0);
+    """
+
+    def __init__(self, path: str, max_entries: int, idle_ttl_seconds: float,
+                 guest_idle_ttl_seconds: float, max_messages: int,
+                 batch_size: int, flush_interval_seconds: float):
+        super().__init__()
+        self.db = get_database(path)
+        self.max_entries = max_entries
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.guest_idle_ttl_seconds = guest_idle_ttl_seconds
+        self.max_messages = max_messages
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending_touches: Dict[str, float] = {}
+        self._pending_messages: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._stop_flusher = None
+        self._flusher = None
+        self.db.executescript(self.SCHEMA)
+
+    def start(self):
+        """Start the sweeper and the timed flusher"""
+        super().start()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(self.flush_interval_seconds):
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"⚠️ Session flush failed: {e}")
+
+        self._flusher = threading.Thread(target=run, name="session-flusher", daemon=True)
+        self._flusher.start()
+        self._stop_flusher = stop
+
+    def close(self):
+        """Stop both threads, then write whatever is still buffered"""
+        super().close()
+        if self._stop_flusher is not None:
+            self._stop_flusher.set()
+            self._flusher.join()
+            self._stop_flusher = self._flusher = None
+        self.flush()
+
+    def _bump(self, name: str, delta: int):
+        if delta:
+            self.db.conn.execute(
+                "UPDATE session_counters SET value = value + ? WHERE name = ?", (delta, name)
+            )
+
+    def flush(self):
+        """Write buffered session touches and messages in one transaction"""
+        with self._pending_lock:
+            touches, self._pending_touches = self._pending_touches, {}
+            messages, self._pending_messages = self._pending_messages, []
+        if not touches and not messages:
+            return
+
+        with self.db.lock, self.db.conn as conn:
+            created = 0
+            for phone_number, last_active in touches.items():
+                created += conn.execute(
+                    "INSERT OR IGNORE INTO sessions (phone_number, created_at, last_active) VALUES (?, ?, ?)",
+                    (phone_number, datetime.now().isoformat(), last_active)
+                ).rowcount
+                conn.execute(
+                    "UPDATE sessions SET last_active = MAX(last_active, ?) WHERE phone_number = ?",
+                    (last_active, phone_number)
+                )
+            self._bump("sessions", created)
+
+            conn.executemany(
+                "INSERT INTO messages (phone_number, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                messages
+            )
+
+            added = defaultdict(int)
+            for message in messages:
+                added[message[0]] += 1
+
+            net_messages = 0
+            for phone_number, count in added.items():
+                conn.execute(
+                    "UPDATE sessions SET message_count = message_count + ? WHERE phone_number = ?",
+                    (count, phone_number)
+                )
+                net_messages += count
+
+                # Enforce the per-session cap by dropping the oldest messages
+                total = conn.execute(
+                    "SELECT message_count FROM sessions WHERE phone_number = ?", (phone_number,)
+                ).fetchone()[0]
+                excess = total - self.max_messages
+                if excess > 0:
+                    conn.execute(
+                        "DELETE FROM messages WHERE id IN ("
+                        "SELECT id FROM messages WHERE phone_number = ? ORDER BY id LIMIT ?)",
+                        (phone_number, excess)
+                    )
+                    conn.execute(
+                        "UPDATE sessions SET message_count = ? WHERE phone_number = ?",
+                        (self.max_messages, phone_number)
+                    )
+                    net_messages -= excess
+            self._bump("messages", net_messages)
+
+    def _touch(self, phone_number: str):
+        with self._pending_lock:
+            self._pending_touches[phone_number] = time.time()
+            pending = len(self._pending_messages)
+        if pending >= self.batch_size:
+            self.flush()
+
+    def ensure(self, phone_number: str):
+        self._touch(phone_number)
+
+    def get(self, phone_number: str) -> Optional[Dict]:
+        self.flush()
+        with self.db.lock:
+            row = self.db.conn.execute(
+                "SELECT created_at FROM sessions WHERE phone_number = ?", (phone_number,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = self.db.conn.execute(
+                "SELECT role, content, timestamp FROM messages WHERE phone_number = ? ORDER BY id",
+                (phone_number,)
+            ).fetchall()
+        return {
+            "created_at": datetime.fromisoformat(row[0]),
+            "messages": [
+                {"role": role, "content": content, "timestamp": datetime.fromisoformat(timestamp)}
+                for role, content, timestamp in messages
+            ]
+        }
+
+    def message_count(self, phone_number: str) -> int:
+        # Persisted count plus the buffer, without forcing a flush on every chat
+        with self._pending_lock:
+            pending = sum(1 for message in self._pending_messages if message[0] == phone_number)
+        with self.db.lock:
+            row = self.db.conn.execute(
+                "SELECT message_count FROM sessions WHERE phone_number = ?", (phone_number,)
+            ).fetchone()
+        return min((row[0] if row else 0) + pending, self.max_messages)
+
+    def append(self, phone_number: str, role: str, content: str):
+        with self._pending_lock:
+            self._pending_messages.append((phone_number, role, content, datetime.now().isoformat()))
+        self._touch(phone_number)
+
+    def reset(self, phone_number: str):
+        self.flush()
+        with self.db.lock, self.db.conn as conn:
+            deleted = conn.execute(
+                "DELETE FROM messages WHERE phone_number = ?", (phone_number,)
+            ).rowcount
+            conn.execute(
+                "UPDATE sessions SET message_count = 0 WHERE phone_number = ?", (phone_number,)
+            )
+            self._bump("messages", -deleted)
+
+    def _delete_sessions(self, conn, phone_numbers: List[str]):
+        for phone_number in phone_numbers:
+            deleted = conn.execute(
+                "DELETE FROM messages WHERE phone_number = ?", (phone_number,)
+            ).rowcount
+            conn.execute("DELETE FROM sessions WHERE phone_number = ?", (phone_number,))
+            self._bump("messages", -deleted)
+        self._bump("sessions", -len(phone_numbers))
+        self._bump("evicted", len(phone_numbers))
+
+    def sweep(self) -> int:
+        self.flush()
+        now = time.time()
+        with self.db.lock, self.db.conn as conn:
+            expired = [row[0] for row in conn.execute(
+                # Same test as is_guest(): both prefixes are 6 characters long
+                "SELECT phone_number FROM sessions WHERE last_active < ? "
+                "OR (last_active < ? AND substr(phone_number, 1, 6) IN (?, ?))",
+                (now - self.idle_ttl_seconds, now - self.guest_idle_ttl_seconds, *GUEST_PREFIXES)
+            )]
+            self._delete_sessions(conn, expired)
+
+            excess = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                oldest = [row[0] for row in conn.execute(
+                    "SELECT phone_number FROM sessions ORDER BY last_active LIMIT ?", (excess,)
+                )]
+                self._delete_sessions(conn, oldest)
+                expired.extend(oldest)
+
+        self._notify_evicted(expired)
+        return len(expired)
+
+    def stats(self) -> Dict:
+        with self.db.lock:
+            counters = dict(self.db.conn.execute("SELECT name, value FROM session_counters").fetchall())
+        with self._pending_lock:
+            pending = len(self._pending_messages)
+        return {
+            "backend": "sqlite",
+            "sessions_active": counters.get("sessions", 0),
+            "total_messages": counters.get("messages", 0) + pending,
+            "sessions_evicted": counters.get("evicted", 0),
+            "max_entries": self.max_entries,
+            "pending_writes": pending,
+        }
+
+
+def create_session_store() -> SessionStore:
+    """Create the session store selected in config (start() runs its background threads)"""
+    if config.SESSION_STORE == "sqlite":
+        return SQLiteSessionStore(
+            path=config.SQLITE_PATH,
+            max_entries=config.SESSION_MAX_ENTRIES,
+            idle_ttl_seconds=config.SESSION_IDLE_TTL_SECONDS,
+            guest_idle_ttl_seconds=config.SESSION_GUEST_IDLE_TTL_SECONDS,
+            max_messages=config.SESSION_MAX_MESSAGES,
+            batch_size=config.SQLITE_BATCH_SIZE,
+            flush_interval_seconds=config.SQLITE_FLUSH_INTERVAL_SECONDS
+        )
+
+    if config.SESSION_STORE != "memory":
+        print(f"⚠️ Unknown SESSION_STORE '{config.SESSION_STORE}', using in-memory sessions")
+
+    return InMemorySessionStore(
+        max_entries=config.SESSION_MAX_ENTRIES,
+        idle_ttl_seconds=config.SESSION_IDLE_TTL_SECONDS,
+        guest_idle_ttl_seconds=config.SESSION_GUEST_IDLE_TTL_SECONDS,
+        max_messages=config.SESSION_MAX_MESSAGES
+    )
@@ -0,0 +1,68 @@
+"""
+startup.py
+Staged startup state for the readiness probe
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class StartupTracker:
+    """
+    Per-component state (pending → loading → ready / failed) and how long
+    each startup stage took
+    """
+
+    def __init__(self, components: List[str]):
+        self._lock = threading.Lock()
+        self._created = time.perf_counter()
+        self._components = {name: {"state": "pending", "seconds": None, "error": None} for name in components}
+        self._ready_after = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark a component as loading for the duration of the block"""
+        start = time.perf_counter()
+        with self._lock:
+            self._components[name]["state"] = "loading"
+        try:
+            yield
+        except Exception as e:
+            self._finish(name, "failed", start, str(e))
+            raise
+        self._finish(name, "ready", start)
+
+    def _finish(self, name: str, state: str, start: float, error: str = None):
+        with self._lock:
+            self._components[name].update(
+                state=state,
+                seconds=round(time.perf_counter() - start, 3),
+                error=error
+            )
+            if all(c["state"] == "ready" for c in self._components.values()):
+                self._ready_after = round(time.perf_counter() - self._created, 3)
+
+    def fail(self, name: str, error: str):
+        """Mark a component failed without a timed stage (e.g. missing configuration)"""
+        with self._lock:
+            self._components[name].update(state="failed", error=error)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self._ready_after is not None
+
+    @property
+    def failed(self) -> bool:
+        with self._lock:
+            return any(c["state"] == "failed" for c in self._components.values())
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "ready": self._ready_after is not None,
+                "components": {name: dict(c) for name, c in self._components.items()},
+                "ready_after_seconds": self._ready_after,
+                "uptime_seconds": round(time.perf_counter() - self._created, 3)
+            }
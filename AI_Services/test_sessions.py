@@ -0,0 +1,57 @@
+"""
+test_sessions.py
+Guest-session expiry in both session store backends
+"""
+import time
+import pytest
+from sessions import InMemorySessionStore, SQLiteSessionStore, is_guest
+
+
+# Session ID format sent by the web widget (frontend ChatInterface.jsx)
+WIDGET_GUEST_ID = "guest-" + str(int(time.time() * 1000))
+
+
+def make_store(backend, tmp_path):
+    settings = dict(max_entries=100, idle_ttl_seconds=3600,
+                    guest_idle_ttl_seconds=0.01, max_messages=20)
+    if backend == "memory":
+        return InMemorySessionStore(**settings)
+    return SQLiteSessionStore(path=str(tmp_path / "sessions.db"), batch_size=50,
+                              flush_interval_seconds=60, **settings)
+
+
+def test_is_guest_matches_api_and_widget_ids():
+    assert is_guest("guest_1a2b3c4d")
+    assert is_guest(WIDGET_GUEST_ID)
+    assert not is_guest("08012345678")
+    assert not is_guest(None)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_sweep_evicts_guest_sessions_after_guest_ttl(backend, tmp_path):
+    store = make_store(backend, tmp_path)
+    for phone_number in (WIDGET_GUEST_ID, "guest_1a2b3c4d", "08012345678"):
+        store.append(phone_number, "user", "hi")
+    time.sleep(0.05)
+
+    assert store.sweep() == 2
+    assert store.get(WIDGET_GUEST_ID) is None
+    assert store.get("08012345678") is not None
+
+
+def test_sweep_survives_a_bad_key():
+    store = make_store("memory", None)
+    store.ensure(None)
+    store.ensure("guest_1a2b3c4d")
+    time.sleep(0.05)
+
+    assert store.sweep() == 1
+
+
+def test_sqlite_message_count_includes_buffered_messages_without_flushing(tmp_path):
+    store = make_store("sqlite", tmp_path)
+    store.append("08012345678", "user", "hi")
+    store.append("08012345678", "assistant", "hello")
+
+    assert store.message_count("08012345678") == 2
+    assert store.stats()["pending_writes"] == 2
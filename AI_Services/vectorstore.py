@@ -2,21 +2,139 @@
 vectorscore.py
 Vector store management using Sentence Transformers
 """
-from langchain_chroma import Chroma
-# from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import json
+import os
+import platform
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
 from config import config
-from documents import load_documents, create_sample_documents, split_documents
+from ingest import sync_vector_store, settings_fingerprint
+from faq import sync_faq_index
 
 
-def create_embeddings():
-    """Create Sentence Transformer embeddings"""
-    print(f"🔍 Loading Sentence Transformer: {config.SENTENCE_TRANSFORMER_MODEL}")
+# Names the active directory under INDEX_GENERATIONS_PATH, and the one it replaced
+ACTIVE_POINTER_FILE = "ACTIVE"
+PREVIOUS_POINTER_FILE = "PREVIOUS"
+
+# Held (across threads and worker processes) while an index directory is
+# written or copied, so a copy never sees a half-written index
+WRITE_LOCK_FILE = "index.lock"
+_write_lock = threading.Lock()
+
+# Describes a built index artifact; required to open one in load-only mode
+INDEX_INFO_FILE = "index_info.json"
+INDEX_FORMAT_VERSION = 1
+
+# ONNX exports shipped in the model repo: fp32, and int8 with dynamic
+# quantization built for each CPU family (best instruction set first)
+ONNX_FP32_FILE = "onnx/model.onnx"
+ONNX_INT8_FILES = [
+    ("avx512_vnni", "onnx/model_qint8_avx512_vnni.onnx"),
+    ("avx512f", "onnx/model_qint8_avx512.onnx"),
+    ("avx2", "onnx/model_quint8_avx2.onnx"),
+]
+ONNX_INT8_ARM_FILE = "onnx/model_qint8_arm64.onnx"
+
+# Sample texts for the ONNX vs PyTorch cosine agreement check
+PARITY_TEXTS = [
+    "NELFUND student loan eligibility",
+    "How do I apply for a student loan?",
+    "When does loan repayment begin after graduation?",
+    "Students must be admitted into a public tertiary institution in Nigeria.",
+    "The Fund shall pay tuition fees directly to the institution.",
+    "What documents are required: BVN, NIN and admission letter.",
+]
+
+
+def embedding_backend_name(backend: str = None, quantized: bool = None) -> str:
+    """Label for the embedding runtime: torch, onnx or onnx-int8"""
+    backend = backend or config.EMBEDDING_BACKEND
+    quantized = config.EMBEDDING_ONNX_QUANTIZED if quantized is None else quantized
+    if backend != "onnx":
+        return "torch"
+    return "onnx-int8" if quantized else "onnx"
+
+
+def _cpu_flags() -> set:
+    """CPU feature flags from /proc/cpuinfo (empty where it is unavailable)"""
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def onnx_model_file(quantized: bool = None) -> str:
+    """
+    ONNX export to load: EMBEDDING_ONNX_FILE if set, else fp32, or the int8
+    export matching this CPU's instruction set
+    """
+    quantized = config.EMBEDDING_ONNX_QUANTIZED if quantized is None else quantized
+    if config.EMBEDDING_ONNX_FILE:
+        return config.EMBEDDING_ONNX_FILE
+    if not quantized:
+        return ONNX_FP32_FILE
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return ONNX_INT8_ARM_FILE
+    flags = _cpu_flags()
+    for flag, file_name in ONNX_INT8_FILES:
+        if flag in flags:
+            return file_name
+    raise RuntimeError("No int8 ONNX export for this CPU; set EMBEDDING_ONNX_FILE "
+                       "or EMBEDDING_ONNX_QUANTIZED=false")
+
+
+def _embedding_model_kwargs(backend: str, quantized: bool) -> Dict:
+    """SentenceTransformer kwargs for the requested runtime"""
+    if backend != "onnx":
+        return {'device': 'cpu'}
+    # sentence-transformers loads the ONNX export shipped with the model repo
+    # (or exports one on first use) and runs it through ONNX Runtime
+    return {
+        'device': 'cpu',
+        'backend': 'onnx',
+        'model_kwargs': {
+            'file_name': onnx_model_file(quantized),
+            'provider': 'CPUExecutionProvider'
+        }
+    }
+
+
+def embedding_parity(reference, candidate, texts: List[str]) -> Dict:
+    """Cosine agreement between two embedding backends on the same texts"""
+    a = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    b = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    cosines = np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return {
+        "texts": len(texts),
+        "min_cosine": round(float(cosines.min()), 5),
+        "mean_cosine": round(float(cosines.mean()), 5)
+    }
+
+
+def create_embeddings(backend: str = None, quantized: bool = None):
+    """Create Sentence Transformer embeddings on the configured runtime"""
+    # Imported on first use: langchain_community.embeddings pulls in a large
+    # part of langchain_community (and sentence-transformers / torch)
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    
+    backend = backend or config.EMBEDDING_BACKEND
+    quantized = config.EMBEDDING_ONNX_QUANTIZED if quantized is None else quantized
+    label = embedding_backend_name(backend, quantized)
+    print(f"🔍 Loading Sentence Transformer: {config.SENTENCE_TRANSFORMER_MODEL} ({label})")
     
     try:
         embeddings = HuggingFaceEmbeddings(
             model_name=config.SENTENCE_TRANSFORMER_MODEL,
-            model_kwargs={'device': 'cpu'},
+            model_kwargs=_embedding_model_kwargs(backend, quantized),
             encode_kwargs={'normalize_embeddings': True}
         )
         print("✅ Sentence Transformer embeddings loaded successfully")
@@ -26,46 +144,347 @@ def create_embeddings():
         test_embedding = embeddings.embed_query(test_text)
         print(f"   Embedding dimension: {len(test_embedding)}")
         
+        if backend == "onnx" and config.EMBEDDING_PARITY_CHECK:
+            reference = create_embeddings(backend="torch")
+            parity = embedding_parity(reference, embeddings, PARITY_TEXTS)
+            print(f"   Parity vs PyTorch: min cosine {parity['min_cosine']}, mean {parity['mean_cosine']}")
+            if parity["min_cosine"] < config.EMBEDDING_PARITY_MIN_COSINE:
+                print(f"⚠️ ONNX embeddings diverge from PyTorch (min cosine below "
+                      f"{config.EMBEDDING_PARITY_MIN_COSINE})")
+        
         return embeddings
         
     except Exception as e:
         print(f"❌ Failed to load Sentence Transformer: {e}")
+        if backend != "torch":
+            # A silent fallback would embed with a different runtime than the
+            # index fingerprint records
+            raise RuntimeError(f"{label} embeddings failed to load: {e}") from e
         print("⚠️ Using default embeddings as fallback")
         return HuggingFaceEmbeddings(
             model_name="sentence-transformers/all-MiniLM-L6-v2"
         )
 
 
-def create_vector_store():
+class VectorIndex:
     """
-    Create and populate the vector database.
-    This should be run once during initialization.
+    Exact in-memory vector index: all (normalized) chunk embeddings in one
+    contiguous float32 matrix, so top-k is a single matrix-vector product.
+    Persists to a memory-mappable .npy file plus a JSON metadata file and
+    implements the subset of the Chroma interface used by ingest and
+    NelfundRetriever.
     """
-    print("\n🔧 Setting up vector database...")
     
-    # Load documents
-    documents = load_documents(config.DOCUMENT_PATHS)
+    MATRIX_FILE = "vectors.npy"
+    METADATA_FILE = "vectors.json"
+    
+    def __init__(self, embedding_function, persist_directory: str = None):
+        self._embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict] = []
+        self._matrix = None
+        self._rows: Dict[str, int] = {}
+        
+        if persist_directory and os.path.exists(os.path.join(persist_directory, self.METADATA_FILE)):
+            self._load()
+    
+    @property
+    def embeddings(self):
+        return self._embedding_function
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def _load(self):
+        with open(os.path.join(self.persist_directory, self.METADATA_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        # Indexes written before the metadata named its matrix file use MATRIX_FILE
+        matrix_file = meta.get("matrix", self.MATRIX_FILE)
+        try:
+            # Memory-mapped read-only; any mutation produces an in-memory copy
+            matrix = np.load(os.path.join(self.persist_directory, matrix_file), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Vector matrix {matrix_file} unreadable ({e}) - starting from an empty index")
+            return
+        rows = len(meta["ids"])
+        if meta.get("rows", rows) != rows or matrix.shape[0] != rows:
+            print(f"⚠️ Vector index files disagree ({matrix.shape[0]} matrix rows, {rows} ids, "
+                  f"{meta.get('rows')} recorded) - starting from an empty index")
+            return
+        self._ids = meta["ids"]
+        self._texts = meta["documents"]
+        self._metadatas = meta["metadatas"]
+        self._matrix = matrix
+        self._rows = {doc_id: i for i, doc_id in enumerate(self._ids)}
+    
+    def persist(self):
+        """
+        Write the matrix under a fresh name, then atomically replace the
+        metadata that points at it: a crash at any point leaves either the
+        old or the new pair on disk, never a mix
+        """
+        if not self.persist_directory:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        matrix_file = f"vectors-{uuid.uuid4().hex[:12]}.npy"
+        meta_path = os.path.join(self.persist_directory, self.METADATA_FILE)
+        
+        matrix = self._matrix if self._matrix is not None else np.zeros((0, 0), dtype=np.float32)
+        with open(os.path.join(self.persist_directory, matrix_file), "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+            f.flush()
+            os.fsync(f.fileno())
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "matrix": matrix_file,
+                "rows": len(self._ids),
+                "ids": self._ids,
+                "documents": self._texts,
+                "metadatas": self._metadatas
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(meta_path + ".tmp", meta_path)
+        
+        # Matrices no longer referenced (a file still memory-mapped elsewhere
+        # cannot be removed on Windows; it goes on a later persist)
+        for name in os.listdir(self.persist_directory):
+            if name != matrix_file and name.startswith("vectors") and name.endswith(".npy"):
+                try:
+                    os.remove(os.path.join(self.persist_directory, name))
+                except OSError:
+                    pass
+    
+    def get(self, ids: List[str] = None, include: List[str] = None) -> Dict:
+        """Chroma-style get: ids plus the requested documents/metadatas"""
+        include = ["documents", "metadatas"] if include is None else include
+        rows = range(len(self._ids)) if ids is None else [self._rows[i] for i in ids if i in self._rows]
+        result = {"ids": [self._ids[r] for r in rows]}
+        if "documents" in include:
+            result["documents"] = [self._texts[r] for r in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[r] for r in rows]
+        return result
+    
+    def reset_collection(self):
+        self._ids, self._texts, self._metadatas = [], [], []
+        self._matrix = None
+        self._rows = {}
+    
+    def delete(self, ids: List[str]):
+        remove = {self._rows[i] for i in ids if i in self._rows}
+        if not remove:
+            return
+        keep = [r for r in range(len(self._ids)) if r not in remove]
+        self._ids = [self._ids[r] for r in keep]
+        self._texts = [self._texts[r] for r in keep]
+        self._metadatas = [self._metadatas[r] for r in keep]
+        self._matrix = np.asarray(self._matrix)[keep]
+        self._rows = {doc_id: i for i, doc_id in enumerate(self._ids)}
+    
+    def add_embeddings(self, ids: List[str], vectors, documents: List[Document]):
+        """Add (or replace) chunks whose embeddings are already computed"""
+        self.delete([i for i in ids if i in self._rows])
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        
+        self._matrix = vectors if self._matrix is None or not len(self._ids) else np.vstack([self._matrix, vectors])
+        for doc_id, doc in zip(ids, documents):
+            self._rows[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+            self._texts.append(doc.page_content)
+            self._metadatas.append(dict(doc.metadata))
+    
+    def add_documents(self, documents: List[Document], ids: List[str]):
+        vectors = self._embedding_function.embed_documents([doc.page_content for doc in documents])
+        self.add_embeddings(ids, vectors, documents)
+    
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self._texts[row], metadata=self._metadatas[row], id=self._ids[row])
     
-    if not documents:
-        print("⚠️ No documents loaded. Creating sample data...")
-        documents = create_sample_documents()
+    def _scores(self, embedding) -> np.ndarray:
+        return self._matrix @ np.asarray(embedding, dtype=np.float32)
     
-    # Split documents
-    splits = split_documents(documents)
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4) -> List[Tuple[Document, float]]:
+        """Exact top-k by cosine similarity"""
+        if not self._ids:
+            return []
+        scores = self._scores(embedding)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._document(int(r)), float(scores[r])) for r in top]
     
-    # Create embeddings
-    embeddings = create_embeddings()
+    def similarity_search_by_vector(self, embedding, k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
     
-    # Create vector store
-    print("💾 Creating vector store...")
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        embedding=embeddings,
-        persist_directory=config.VECTOR_STORE_PATH
+    def max_marginal_relevance_search_by_vector(self, embedding, k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5) -> List[Document]:
+        """MMR over the top fetch_k candidates, vectorized over the candidate matrix"""
+        if not self._ids:
+            return []
+        scores = self._scores(embedding)
+        fetch_k = min(fetch_k, len(scores))
+        candidates = np.argpartition(-scores, fetch_k - 1)[:fetch_k]
+        relevance = scores[candidates]
+        vectors = np.asarray(self._matrix[candidates])
+        pairwise = vectors @ vectors.T
+        
+        selected = [int(np.argmax(relevance))]
+        redundancy = pairwise[:, selected[0]].copy()
+        while len(selected) < min(k, fetch_k):
+            mmr = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+            mmr[selected] = -np.inf
+            pick = int(np.argmax(mmr))
+            selected.append(pick)
+            np.maximum(redundancy, pairwise[:, pick], out=redundancy)
+        
+        return [self._document(int(candidates[i])) for i in selected]
+
+
+def active_index_path() -> str:
+    """
+    Directory of the active index generation, as recorded by the last
+    successful reload, or VECTOR_STORE_PATH if no generation exists yet
+    """
+    pointer = os.path.join(config.INDEX_GENERATIONS_PATH, ACTIVE_POINTER_FILE)
+    try:
+        with open(pointer, "r", encoding="utf-8") as f:
+            path = os.path.join(config.INDEX_GENERATIONS_PATH, f.read().strip())
+    except OSError:
+        return config.VECTOR_STORE_PATH
+    return path if os.path.isdir(path) else config.VECTOR_STORE_PATH
+
+
+def _lock_file(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
+    import fcntl
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def index_write_lock():
+    """Exclusive lock over index writes and copies, shared by every worker process"""
+    with _write_lock:
+        os.makedirs(config.INDEX_GENERATIONS_PATH, exist_ok=True)
+        with open(os.path.join(config.INDEX_GENERATIONS_PATH, WRITE_LOCK_FILE), "a+b") as f:
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+
+def open_vector_store(embeddings, persist_directory: str = None):
+    """Open (or create) the persisted index for the configured backend"""
+    persist_directory = persist_directory or active_index_path()
+    if config.VECTOR_BACKEND == "numpy":
+        return VectorIndex(embeddings, persist_directory=persist_directory)
+    
+    from langchain_chroma import Chroma
+    return Chroma(
+        embedding_function=embeddings,
+        persist_directory=persist_directory
     )
+
+
+def create_vector_store(embeddings=None, persist_directory: str = None):
+    """
+    Open the persisted vector database and bring it up to date.
+    Only new or changed documents are embedded; an unchanged corpus
+    is opened as-is.
+    """
+    print("\n🔧 Setting up vector database...")
+    persist_directory = persist_directory or active_index_path()
     
-    print(f"✅ Vector store created at {config.VECTOR_STORE_PATH}")
-    print(f"   Total documents: {len(splits)}")
+    # Create embeddings (a reload reuses the model that is already loaded)
+    if embeddings is None:
+        embeddings = create_embeddings()
+    
+    with index_write_lock():
+        # Open the existing collection and sync it with the documents on disk
+        vectorstore = open_vector_store(embeddings, persist_directory)
+        sync_vector_store(vectorstore, config.DOCUMENT_PATHS, persist_directory)
+        
+        # Question/answer pairs for the FAQ fast path
+        if config.FAQ_ENABLED:
+            sync_faq_index(embeddings, config.FAQ_DOCUMENT_PATHS, persist_directory)
+        
+        total = len(vectorstore.get(include=[])["ids"])
+        write_index_info(persist_directory, total)
+    print(f"✅ Vector store ready at {persist_directory} ({config.VECTOR_BACKEND} backend)")
+    print(f"   Total chunks: {total}")
     print(f"   Embedding model: {config.SENTENCE_TRANSFORMER_MODEL}")
     
-    return vectorstore
\ No newline at end of file
+    return vectorstore
+
+
+def write_index_info(persist_directory: str, chunks: int):
+    """Record what an index directory contains and the settings it was built with"""
+    info = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "backend": config.VECTOR_BACKEND,
+        "settings": settings_fingerprint(),
+        "chunks": chunks,
+        "faq_index": config.FAQ_ENABLED
+    }
+    path = os.path.join(persist_directory, INDEX_INFO_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def read_index_info(persist_directory: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(persist_directory, INDEX_INFO_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_vector_store(embeddings=None, persist_directory: str = None):
+    """
+    Open a prebuilt index artifact without touching it: no document
+    loading, no embedding, no writes. Raises RuntimeError if the artifact
+    is missing or was built with different settings than this server.
+    """
+    persist_directory = persist_directory or active_index_path()
+    print(f"\n📦 Opening prebuilt index at {persist_directory} (load-only)")
+    
+    info = read_index_info(persist_directory)
+    if info is None:
+        raise RuntimeError(f"No index artifact at {persist_directory} - run build_index.py first")
+    if info.get("format_version") != INDEX_FORMAT_VERSION or info.get("backend") != config.VECTOR_BACKEND:
+        raise RuntimeError(f"Index artifact at {persist_directory} has an incompatible format or backend")
+    if info.get("settings") != settings_fingerprint():
+        raise RuntimeError(f"Index artifact at {persist_directory} was built with different settings "
+                           f"({info.get('settings')}) - rebuild it with build_index.py")
+    
+    if embeddings is None:
+        embeddings = create_embeddings()
+    vectorstore = open_vector_store(embeddings, persist_directory)
+    
+    print(f"✅ Vector store ready at {persist_directory} ({info['chunks']} chunks, built {info['built_at']})")
+    return vectorstore